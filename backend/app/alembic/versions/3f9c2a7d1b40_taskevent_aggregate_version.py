@@ -0,0 +1,44 @@
+"""Unique aggregate version on taskevent
+
+Revision ID: 3f9c2a7d1b40
+Revises: 728d18f52604
+Create Date: 2026-10-18 09:12:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a7d1b40'
+down_revision = '728d18f52604'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Events were all written with the version of the task at the time, renumber
+    # every stream 1..n in timestamp order before enforcing uniqueness
+    op.execute("""
+        UPDATE taskevent SET version = numbered.version
+        FROM (
+            SELECT id, row_number() OVER (PARTITION BY aggregate_id ORDER BY timestamp, id) AS version
+            FROM taskevent
+        ) AS numbered
+        WHERE taskevent.id = numbered.id
+    """)
+    op.execute("""
+        UPDATE employeetask SET version = streams.version
+        FROM (
+            SELECT aggregate_id, max(version) AS version FROM taskevent GROUP BY aggregate_id
+        ) AS streams
+        WHERE employeetask.id = streams.aggregate_id
+    """)
+    op.create_unique_constraint(
+        'uq_taskevent_aggregate_id_version',
+        'taskevent',
+        ['aggregate_id', 'version']
+    )
+
+
+def downgrade():
+    op.drop_constraint('uq_taskevent_aggregate_id_version', 'taskevent', type_='unique')
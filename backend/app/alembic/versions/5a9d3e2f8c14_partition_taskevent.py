@@ -0,0 +1,95 @@
+"""Partition taskevent by month
+
+Revision ID: 5a9d3e2f8c14
+Revises: e1f5b8c3a7d6
+Create Date: 2026-10-18 13:05:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5a9d3e2f8c14'
+down_revision = 'e1f5b8c3a7d6'
+branch_labels = None
+depends_on = None
+
+COLUMNS = """
+    id uuid NOT NULL,
+    aggregate_id uuid NOT NULL,
+    timestamp timestamp without time zone NOT NULL,
+    version integer NOT NULL,
+    event_type varchar(100) NOT NULL,
+    assigned_to_id uuid,
+    task_id uuid,
+    reason varchar(500),
+    approved_by_id uuid,
+    title varchar(500),
+    description varchar(500),
+    requires_approval boolean,
+    sequence bigint GENERATED BY DEFAULT AS IDENTITY NOT NULL,
+    transaction_id bigint DEFAULT (pg_current_xact_id()::text::bigint) NOT NULL
+"""
+
+
+def upgrade():
+    op.execute("DROP TRIGGER taskevent_notify ON taskevent")
+    op.execute("ALTER TABLE taskevent RENAME TO taskevent_unpartitioned")
+    op.execute("ALTER INDEX taskevent_pkey RENAME TO taskevent_unpartitioned_pkey")
+    op.execute(f"CREATE TABLE taskevent ({COLUMNS}, CONSTRAINT taskevent_pkey PRIMARY KEY (id, timestamp)) PARTITION BY RANGE (timestamp)")
+    op.execute("CREATE TABLE taskevent_default PARTITION OF taskevent DEFAULT")
+    # One partition per month that has events, up to three months ahead
+    op.execute("""
+        DO $$
+        DECLARE
+            month date;
+        BEGIN
+            FOR month IN
+                SELECT generate_series(
+                    date_trunc('month', coalesce((SELECT min(timestamp) FROM taskevent_unpartitioned), now())),
+                    date_trunc('month', now()) + interval '3 months',
+                    interval '1 month'
+                )::date
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF taskevent FOR VALUES FROM (%L) TO (%L)',
+                    'taskevent_y' || to_char(month, 'YYYY') || 'm' || to_char(month, 'MM'),
+                    month, (month + interval '1 month')::date
+                );
+            END LOOP;
+        END
+        $$
+    """)
+    op.execute("""
+        INSERT INTO taskevent (id, aggregate_id, timestamp, version, event_type, assigned_to_id, task_id, reason,
+                               approved_by_id, title, description, requires_approval, sequence, transaction_id)
+        SELECT id, aggregate_id, timestamp, version, event_type, assigned_to_id, task_id, reason,
+               approved_by_id, title, description, requires_approval, sequence, transaction_id
+        FROM taskevent_unpartitioned
+    """)
+    op.execute("SELECT setval(pg_get_serial_sequence('taskevent', 'sequence'), coalesce(max(sequence), 0) + 1, false) FROM taskevent")
+    op.execute("DROP TABLE taskevent_unpartitioned")
+
+    op.execute("CREATE INDEX ix_taskevent_aggregate_id_version ON taskevent (aggregate_id, version)")
+    op.execute("CREATE INDEX ix_taskevent_sequence ON taskevent (sequence)")
+    op.execute("CREATE INDEX ix_taskevent_timestamp_brin ON taskevent USING brin (timestamp)")
+    op.execute("CREATE TRIGGER taskevent_notify AFTER INSERT ON taskevent FOR EACH STATEMENT EXECUTE FUNCTION notify_taskevent()")
+
+
+def downgrade():
+    op.execute("DROP TRIGGER taskevent_notify ON taskevent")
+    op.execute("ALTER TABLE taskevent RENAME TO taskevent_partitioned")
+    op.execute("ALTER INDEX taskevent_pkey RENAME TO taskevent_partitioned_pkey")
+    op.execute(f"CREATE TABLE taskevent ({COLUMNS}, CONSTRAINT taskevent_pkey PRIMARY KEY (id))")
+    op.execute("""
+        INSERT INTO taskevent (id, aggregate_id, timestamp, version, event_type, assigned_to_id, task_id, reason,
+                               approved_by_id, title, description, requires_approval, sequence, transaction_id)
+        SELECT id, aggregate_id, timestamp, version, event_type, assigned_to_id, task_id, reason,
+               approved_by_id, title, description, requires_approval, sequence, transaction_id
+        FROM taskevent_partitioned
+    """)
+    op.execute("SELECT setval(pg_get_serial_sequence('taskevent', 'sequence'), coalesce(max(sequence), 0) + 1, false) FROM taskevent")
+    op.execute("DROP TABLE taskevent_partitioned")
+    op.create_unique_constraint('uq_taskevent_aggregate_id_version', 'taskevent', ['aggregate_id', 'version'])
+    op.create_unique_constraint('taskevent_sequence_key', 'taskevent', ['sequence'])
+    op.execute("CREATE TRIGGER taskevent_notify AFTER INSERT ON taskevent FOR EACH STATEMENT EXECUTE FUNCTION notify_taskevent()")
@@ -0,0 +1,34 @@
+"""Archived task pointers
+
+Revision ID: 7c2e9a4b6f18
+Revises: 5a9d3e2f8c14
+Create Date: 2026-10-18 13:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e9a4b6f18'
+down_revision = '5a9d3e2f8c14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('archivedtask',
+    sa.Column('aggregate_id', sa.Uuid(), nullable=False),
+    sa.Column('assigned_to_id', sa.Uuid(), nullable=False),
+    sa.Column('segment', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['assigned_to_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('aggregate_id')
+    )
+    op.create_index(op.f('ix_archivedtask_assigned_to_id'), 'archivedtask', ['assigned_to_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_archivedtask_assigned_to_id'), table_name='archivedtask')
+    op.drop_table('archivedtask')
@@ -0,0 +1,43 @@
+"""Task snapshots and assignment details on taskevent
+
+Revision ID: 8b21d6e4c7a9
+Revises: 3f9c2a7d1b40
+Create Date: 2026-10-18 10:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '8b21d6e4c7a9'
+down_revision = '3f9c2a7d1b40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('taskevent', sa.Column('title', sqlmodel.sql.sqltypes.AutoString(length=500), nullable=True))
+    op.add_column('taskevent', sa.Column('description', sqlmodel.sql.sqltypes.AutoString(length=500), nullable=True))
+    op.add_column('taskevent', sa.Column('requires_approval', sa.Boolean(), nullable=True))
+    # Backfill the assignment details of existing streams from their task rows
+    op.execute("""
+        UPDATE taskevent SET title = t.title, description = t.description, requires_approval = t.requires_approval
+        FROM employeetask t
+        WHERE taskevent.aggregate_id = t.id AND taskevent.event_type = 'TaskAssignedEvent'
+    """)
+    op.create_table('tasksnapshot',
+    sa.Column('aggregate_id', sa.Uuid(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('state', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('aggregate_id')
+    )
+
+
+def downgrade():
+    op.drop_table('tasksnapshot')
+    op.drop_column('taskevent', 'requires_approval')
+    op.drop_column('taskevent', 'description')
+    op.drop_column('taskevent', 'title')
@@ -0,0 +1,37 @@
+"""Outbox for task event side effects
+
+Revision ID: c4e7a1f9d2b3
+Revises: 8b21d6e4c7a9
+Create Date: 2026-10-18 11:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e7a1f9d2b3'
+down_revision = '8b21d6e4c7a9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('outboxmessage',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('topic', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('available_at', sa.DateTime(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sqlmodel.sql.sqltypes.AutoString(length=500), nullable=True),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_outboxmessage_pending', 'outboxmessage', ['available_at'], unique=False, postgresql_where=sa.text('processed_at IS NULL'))
+
+
+def downgrade():
+    op.drop_index('ix_outboxmessage_pending', table_name='outboxmessage', postgresql_where=sa.text('processed_at IS NULL'))
+    op.drop_table('outboxmessage')
@@ -0,0 +1,54 @@
+"""Global sequence and writing transaction on taskevent
+
+Revision ID: e1f5b8c3a7d6
+Revises: c4e7a1f9d2b3
+Create Date: 2026-10-18 12:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1f5b8c3a7d6'
+down_revision = 'c4e7a1f9d2b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing events are numbered in the order they were recorded
+    op.add_column('taskevent', sa.Column('sequence', sa.BigInteger(), nullable=True))
+    op.execute("""
+        UPDATE taskevent SET sequence = numbered.sequence
+        FROM (
+            SELECT id, row_number() OVER (ORDER BY timestamp, aggregate_id, version) AS sequence
+            FROM taskevent
+        ) AS numbered
+        WHERE taskevent.id = numbered.id
+    """)
+    op.alter_column('taskevent', 'sequence', nullable=False)
+    op.execute("ALTER TABLE taskevent ALTER COLUMN sequence ADD GENERATED BY DEFAULT AS IDENTITY")
+    op.execute("SELECT setval(pg_get_serial_sequence('taskevent', 'sequence'), coalesce(max(sequence), 0) + 1, false) FROM taskevent")
+    op.create_unique_constraint('taskevent_sequence_key', 'taskevent', ['sequence'])
+    op.add_column('taskevent', sa.Column(
+        'transaction_id', sa.BigInteger(), nullable=False, server_default=sa.text('pg_current_xact_id()::text::bigint')
+    ))
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_taskevent() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('taskevent', '');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("CREATE TRIGGER taskevent_notify AFTER INSERT ON taskevent FOR EACH STATEMENT EXECUTE FUNCTION notify_taskevent()")
+
+
+def downgrade():
+    op.execute("DROP TRIGGER taskevent_notify ON taskevent")
+    op.execute("DROP FUNCTION notify_taskevent()")
+    op.drop_column('taskevent', 'transaction_id')
+    op.drop_constraint('taskevent_sequence_key', 'taskevent', type_='unique')
+    op.drop_column('taskevent', 'sequence')
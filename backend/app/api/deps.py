@@ -4,8 +4,7 @@ from typing import Annotated
 from sqlalchemy import select
 
 from app.tasks.tasks_service import TaskService
-from app.tasks.task_repository import PostgresTaskRepository
-from app.levels.levels_repository import PostgresLevelsRepository
+from app.tasks.unit_of_work import PostgresUnitOfWork
 from app.levels.levels_service import LevelsService
 from app.api.users.users_models import UserWithSkills, UserWithExperience
 from app.api.users.skills_models import SkillPublic
@@ -34,12 +33,16 @@ def get_db() -> Generator[Session, None, None]:
 SessionDep = Annotated[Session, Depends(get_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
-def get_task_service(db: SessionDep) -> TaskService:
-    return TaskService(PostgresTaskRepository(db))
+def get_unit_of_work(db: SessionDep) -> PostgresUnitOfWork:
+    return PostgresUnitOfWork(db)
+UnitOfWorkDep = Annotated[PostgresUnitOfWork, Depends(get_unit_of_work)]
+
+def get_task_service(uow: UnitOfWorkDep) -> TaskService:
+    return TaskService(uow)
 TaskServiceDep = Annotated[TaskService, Depends(get_task_service)]
 
-def get_level_service(db: SessionDep) -> LevelsService:
-    return LevelsService(PostgresLevelsRepository(db))
+def get_level_service(uow: UnitOfWorkDep) -> LevelsService:
+    return LevelsService(uow.levels)
 LevelsServiceDep = Annotated[LevelsService, Depends(get_level_service)]
 
 def get_current_user(session: SessionDep, token: TokenDep) -> User:
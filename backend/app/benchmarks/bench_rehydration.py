@@ -0,0 +1,97 @@
+"""
+Rehydration cost with and without snapshots on long synthetic histories.
+
+    python -m app.benchmarks.bench_rehydration --events 5000 --snapshot-every 50
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from uuid import UUID, uuid4
+
+from app.models import EmployeeTask, TaskEvent, TaskSnapshot
+from app.tasks.task_models import TaskAssignedEvent, TaskRejectedEvent, TaskSubmittedEvent
+from app.tasks.task_rehydration import TaskRehydrator, fold
+from app.tasks.task_repository import TaskRepository, task_to_state, update_event_data
+
+
+class InMemoryTaskRepository(TaskRepository):
+    def __init__(self):
+        self.events: Dict[UUID, List[TaskEvent]] = {}
+        self.snapshots: Dict[UUID, TaskSnapshot] = {}
+
+    def save_event(self, event) -> None:
+        event_data = {
+            "aggregate_id": event.aggregate_id, "timestamp": event.timestamp, "version": event.version,
+            "assigned_to_id": None, "task_id": None, "reason": None, "approved_by_id": None,
+            "title": None, "description": None, "requires_approval": None,
+        }
+        update_event_data(event, event_data)
+        self.events.setdefault(event.aggregate_id, []).append(TaskEvent(id=uuid4(), **event_data))
+
+    def get_events(self, task_id: UUID, after_version: int = 0) -> List[TaskEvent]:
+        return [event for event in self.events.get(task_id, []) if event.version > after_version]
+
+    def get_snapshot(self, aggregate_id: UUID) -> Optional[TaskSnapshot]:
+        return self.snapshots.get(aggregate_id)
+
+    def save_snapshot(self, task: EmployeeTask) -> None:
+        self.snapshots[task.id] = TaskSnapshot(aggregate_id=task.id, version=task.version, state=task_to_state(task))
+
+
+def synthetic_history(aggregate_id: UUID, length: int):
+    # Assignment followed by submit/reject round trips
+    start = datetime.now()
+    yield TaskAssignedEvent(
+        aggregate_id=aggregate_id, timestamp=start, version=1, assigned_to_id=uuid4(), task_id=uuid4(),
+        title="Synthetic task", description="Benchmark history", requires_approval=True
+    )
+    for version in range(2, length + 1):
+        timestamp = start + timedelta(seconds=version)
+        if version % 2 == 0:
+            yield TaskSubmittedEvent(aggregate_id=aggregate_id, timestamp=timestamp, version=version)
+        else:
+            yield TaskRejectedEvent(aggregate_id=aggregate_id, timestamp=timestamp, version=version, reason="again", approved_by_id=None)
+
+
+def build(ids: List[UUID], length: int, snapshot_every: int) -> InMemoryTaskRepository:
+    repository = InMemoryTaskRepository()
+    for aggregate_id in ids:
+        task = None
+        for event in synthetic_history(aggregate_id, length):
+            repository.save_event(event)
+            task = fold([event], task)
+            if snapshot_every and task.version % snapshot_every == 0:
+                repository.save_snapshot(task)
+    return repository
+
+
+def measure(repository: TaskRepository, ids: List[UUID], rounds: int) -> float:
+    rehydrator = TaskRehydrator(repository)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for aggregate_id in ids:
+            rehydrator.load(aggregate_id)
+    return (time.perf_counter() - started) / (rounds * len(ids))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--aggregates", type=int, default=20)
+    parser.add_argument("--events", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--snapshot-every", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'events':>8} {'full replay (ms)':>18} {'snapshot (ms)':>15} {'speedup':>9}")
+    for length in args.events:
+        ids = [uuid4() for _ in range(args.aggregates)]
+        full = build(ids, length, 0)
+        snapshotted = build(ids, length, args.snapshot_every)
+        without = measure(full, ids, args.rounds)
+        with_snapshots = measure(snapshotted, ids, args.rounds)
+        print(f"{length:>8} {without * 1000:>18.3f} {with_snapshots * 1000:>15.3f} {without / with_snapshots:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
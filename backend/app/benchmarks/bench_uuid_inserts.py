@@ -0,0 +1,69 @@
+"""
+Insert throughput and primary key index size with uuid4 against UUIDv7 ids.
+
+Each run fills a scratch table shaped like taskevent in batches, through the
+same multi-row INSERT path the repositories use, then drops it.
+
+    python -m app.benchmarks.bench_uuid_inserts --rows 1000000 --batch 1000
+"""
+import argparse
+import time
+from datetime import datetime
+from typing import Callable
+from uuid import UUID, uuid4
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, Uuid, func, insert, select, text
+
+from app.core.db import engine
+from app.core.ids import uuid7
+
+
+def scratch_table(name: str) -> Table:
+    return Table(
+        name,
+        MetaData(),
+        Column("id", Uuid, primary_key=True),
+        Column("aggregate_id", Uuid, nullable=False),
+        Column("timestamp", DateTime, nullable=False),
+        Column("version", Integer, nullable=False),
+        Column("event_type", String(100), nullable=False),
+    )
+
+
+def run(name: str, make_id: Callable[[], UUID], rows: int, batch: int) -> tuple[float, int]:
+    table = scratch_table(f"bench_ids_{name}")
+    table.metadata.drop_all(engine)
+    table.metadata.create_all(engine)
+    try:
+        started = time.perf_counter()
+        for offset in range(0, rows, batch):
+            values = [
+                {"id": make_id(), "aggregate_id": uuid4(), "timestamp": datetime.now(), "version": 1, "event_type": "TaskAssignedEvent"}
+                for _ in range(min(batch, rows - offset))
+            ]
+            with engine.begin() as connection:
+                connection.execute(insert(table), values)
+        elapsed = time.perf_counter() - started
+        with engine.connect() as connection:
+            index_size = connection.execute(
+                select(func.pg_relation_size(text(f"'{table.name}_pkey'::regclass")))
+            ).scalar_one()
+        return rows / elapsed, index_size
+    finally:
+        table.metadata.drop_all(engine)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'ids':>6} {'rows/s':>10} {'pkey size (MB)':>15}")
+    for name, make_id in (("uuid4", uuid4), ("uuid7", uuid7)):
+        throughput, index_size = run(name, make_id, args.rows, args.batch)
+        print(f"{name:>6} {throughput:>10.0f} {index_size / 2**20:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
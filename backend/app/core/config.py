@@ -68,6 +68,25 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    # Generate UUIDv7 primary keys for high-insert tables instead of uuid4, see app/core/ids.py
+    TIME_ORDERED_IDS: bool = False
+
+    # Snapshot an EmployeeTask every N event versions to bound rehydration cost
+    TASK_SNAPSHOT_EVERY: int = 50
+
+    # Completed and cancelled tasks older than the retention move to segment files in this directory
+    TASK_ARCHIVE_DIR: str | None = None
+    TASK_ARCHIVE_RETENTION_DAYS: int = 180
+
+    # Run the outbox dispatcher inside the API process, turn off when app/outbox/worker.py runs separately
+    OUTBOX_IN_PROCESS_DISPATCHER: bool = True
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL: float = 1.0
+    OUTBOX_MAX_ATTEMPTS: int = 10
+
+    # Seconds a long-polling feed request waits before checking again without a notification
+    TASK_EVENT_FEED_RECHECK: float = 5.0
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
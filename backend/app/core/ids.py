@@ -0,0 +1,46 @@
+"""
+Primary key generation.
+
+With TIME_ORDERED_IDS enabled, new rows get UUIDv7 ids (RFC 9562): a 48 bit
+millisecond timestamp followed by random bits. Consecutive inserts then land
+on the rightmost B-tree leaf instead of a random page. The columns stay `uuid`,
+so switching needs no migration. Rows written before the switch keep their
+uuid4 ids and sort before or between the new ones, which only costs their
+existing locality. Nothing reads meaning out of an id, so the setting can be
+turned off again at any time.
+"""
+import os
+import threading
+import time
+from uuid import UUID, uuid4
+
+from app.core.config import settings
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7() -> UUID:
+    # rand_a (12 bits) is a counter within the millisecond, so ids of one process are strictly increasing
+    global _last_ms, _counter
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            _counter = int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            _counter += 1
+            if _counter > 0xFFF:
+                # Counter exhausted, borrow the next millisecond
+                _last_ms += 1
+                _counter = 0
+        timestamp, counter = _last_ms, _counter
+
+    rand_b = int.from_bytes(os.urandom(8), "big") & 0x3FFF_FFFF_FFFF_FFFF
+    value = (timestamp & 0xFFFF_FFFF_FFFF) << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | rand_b
+    return UUID(int=value)
+
+
+def new_id() -> UUID:
+    return uuid7() if settings.TIME_ORDERED_IDS else uuid4()
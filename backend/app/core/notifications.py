@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from typing import Dict, Optional
+
+import psycopg
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY = 1.0
+
+
+class PostgresListener:
+    """
+    Shares one LISTEN connection per process between every waiter of a channel.
+    Waiters read the channel's counter, check for work, then wait for the
+    counter to move. A notification that arrives between the check and the
+    wait is therefore not lost.
+    """
+
+    def __init__(self, conninfo: str):
+        self.conninfo = conninfo
+        self.channels: set[str] = set()
+        self.counters: Dict[str, int] = {}
+        self.conditions: Dict[str, asyncio.Condition] = {}
+        self.task: Optional[asyncio.Task] = None
+
+    def position(self, channel: str) -> int:
+        self._ensure_listening(channel)
+        return self.counters.get(channel, 0)
+
+    async def wait(self, channel: str, position: int, timeout: float) -> bool:
+        # True when something was notified on the channel after position
+        self._ensure_listening(channel)
+        condition = self.conditions[channel]
+        async with condition:
+            try:
+                await asyncio.wait_for(
+                    condition.wait_for(lambda: self.counters.get(channel, 0) != position), timeout
+                )
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    def _ensure_listening(self, channel: str) -> None:
+        if channel not in self.channels:
+            self.channels.add(channel)
+            self.conditions[channel] = asyncio.Condition()
+            # The connection is busy waiting for notifications, reconnect to LISTEN on the new channel too
+            if self.task is not None:
+                self.task.cancel()
+                self.task = None
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def _notify(self, channel: str) -> None:
+        self.counters[channel] = self.counters.get(channel, 0) + 1
+        condition = self.conditions.get(channel)
+        if condition is not None:
+            async with condition:
+                condition.notify_all()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self.conninfo, autocommit=True) as connection:
+                    for channel in list(self.channels):
+                        await connection.execute(f'LISTEN "{channel}"')
+                    # Anything sent while we were disconnected may be missed, wake every waiter to recheck
+                    for channel in list(self.channels):
+                        await self._notify(channel)
+                    async for notification in connection.notifies():
+                        await self._notify(notification.channel)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Lost the LISTEN connection, reconnecting")
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def close(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self.task = None
+        # Conditions belong to the event loop that is shutting down
+        self.channels.clear()
+        self.conditions.clear()
+
+
+# The driver takes a plain libpq URL
+listener = PostgresListener(str(settings.SQLALCHEMY_DATABASE_URI).replace("postgresql+psycopg://", "postgresql://"))
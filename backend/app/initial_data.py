@@ -1,8 +1,10 @@
 import logging
+from datetime import date
 
 from sqlmodel import Session
 
 from app.core.db import engine, init_db
+from app.tasks.task_partitions import TaskEventPartitions
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -11,6 +13,9 @@ logger = logging.getLogger(__name__)
 def init() -> None:
     with Session(engine) as session:
         init_db(session)
+        # The default partition takes events of missing months, keep a few months ahead
+        TaskEventPartitions(session).ensure(date.today(), 4)
+        session.commit()
 
 
 def main() -> None:
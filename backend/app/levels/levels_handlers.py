@@ -0,0 +1,14 @@
+from typing import List
+from uuid import UUID
+
+from sqlmodel import Session
+
+from app.levels.levels_models import XpGrant
+from app.levels.levels_repository import PostgresLevelsRepository
+from app.levels.levels_service import LevelsService
+
+
+def grant_completed_tasks_xp(session: Session, payloads: List[dict]) -> None:
+    # Outbox handler for TaskCompletedEvent, the whole batch is granted in one statement
+    grants = [XpGrant(employee_id=UUID(payload["assigned_to_id"]), task_id=UUID(payload["task_id"])) for payload in payloads]
+    LevelsService(PostgresLevelsRepository(session)).tasks_completed(grants)
@@ -1,10 +1,21 @@
-
 # Domain Model
 from dataclasses import dataclass
+from uuid import UUID
 
 @dataclass
 class EmployeeLevelDomain:
     title: str
     version: int = 1
 
-    
\ No newline at end of file
+@dataclass
+class XpGrant:
+    employee_id: UUID
+    task_id: UUID
+
+@dataclass
+class GrantedXp:
+    employee_id: UUID
+    # None for the employee level, the skill id for an employee skill
+    skill_id: UUID | None
+    level: int
+    xp: int
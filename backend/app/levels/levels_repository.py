@@ -3,9 +3,62 @@ from functools import singledispatch
 from typing import List, Optional
 from uuid import UUID
 from requests import Session
-from sqlalchemy import select, insert
+from sqlalchemy import select, insert, text
 from app.models import AvailableTask, EmployeeLevel, EmployeeSkill, GlobalSkill
 from app.api.users.skills_models import EmployeeSkillCreate, GlobalSkillCreate
+from app.levels.levels_models import GrantedXp, XpGrant
+from app.levels.levels_requirements import level_xp_thresholds, skill_xp_thresholds
+
+# Grants the XP of completed tasks in one statement. Employee levels are bumped
+# with UPDATE ... RETURNING and skills are upserted, so concurrent grants for the
+# same employee serialise on the row lock instead of overwriting each other.
+# Thresholds are 1-based arrays, the XP needed for level + 1 sits at [level + 2].
+# Grants of employees deleted in the meantime are dropped.
+GRANT_XP_SQL = text("""
+WITH grant_in AS (
+    SELECT g.employee_id, t.skill_id, t.person_xp, t.skill_xp
+    FROM unnest(CAST(:employee_ids AS uuid[]), CAST(:task_ids AS uuid[])) AS g(employee_id, task_id)
+    JOIN availabletask t ON t.id = g.task_id
+    JOIN "user" u ON u.id = g.employee_id
+),
+person AS (
+    SELECT employee_id, sum(person_xp) AS xp FROM grant_in GROUP BY employee_id
+),
+skill AS (
+    SELECT employee_id, skill_id, sum(skill_xp)::integer AS xp FROM grant_in GROUP BY employee_id, skill_id
+),
+granted_levels AS (
+    UPDATE employee_levels el SET
+        level = CASE
+            WHEN el.xp + floor(p.xp * el.xp_multiplier)::integer >= (CAST(:level_thresholds AS integer[]))[el.level + 2]
+            THEN el.level + 1 ELSE el.level END,
+        xp = CASE
+            WHEN el.xp + floor(p.xp * el.xp_multiplier)::integer >= (CAST(:level_thresholds AS integer[]))[el.level + 2]
+            THEN 0 ELSE el.xp + floor(p.xp * el.xp_multiplier)::integer END,
+        updated_at = LOCALTIMESTAMP
+    FROM person p
+    WHERE el.employee_id = p.employee_id
+    RETURNING el.employee_id, el.level, el.xp
+),
+granted_skills AS (
+    INSERT INTO employeeskill (user_id, skill_id, xp, level)
+    SELECT employee_id, skill_id,
+        CASE WHEN xp >= (CAST(:skill_thresholds AS integer[]))[2] THEN 0 ELSE xp END,
+        CASE WHEN xp >= (CAST(:skill_thresholds AS integer[]))[2] THEN 1 ELSE 0 END
+    FROM skill
+    ON CONFLICT (user_id, skill_id) DO UPDATE SET
+        level = CASE
+            WHEN employeeskill.xp + EXCLUDED.xp >= (CAST(:skill_thresholds AS integer[]))[employeeskill.level + 2]
+            THEN employeeskill.level + 1 ELSE employeeskill.level END,
+        xp = CASE
+            WHEN employeeskill.xp + EXCLUDED.xp >= (CAST(:skill_thresholds AS integer[]))[employeeskill.level + 2]
+            THEN 0 ELSE employeeskill.xp + EXCLUDED.xp END
+    RETURNING user_id, skill_id, level, xp
+)
+SELECT employee_id, NULL::uuid AS skill_id, level, xp FROM granted_levels
+UNION ALL
+SELECT user_id, skill_id, level, xp FROM granted_skills
+""")
 
 # #region Repository Interface
 # @singledispatch
@@ -21,6 +74,7 @@ from app.api.users.skills_models import EmployeeSkillCreate, GlobalSkillCreate
 #     })
 
 class LevelsRepository:
+    # Write methods only stage changes, committing is up to the unit of work
     def save(self, level: EmployeeLevel) -> None:
         raise NotImplementedError
     
@@ -41,6 +95,9 @@ class LevelsRepository:
 
     def create_employee_skill(self, skill_in: EmployeeSkillCreate) -> EmployeeSkill:
         raise NotImplementedError
+
+    def grant_xp(self, grants: List[XpGrant]) -> List[GrantedXp]:
+        raise NotImplementedError
     
     # def get_by_id(self, task_id: UUID) -> Optional[EmployeeTask]:
     #     raise NotImplementedError
@@ -61,7 +118,6 @@ class PostgresLevelsRepository(LevelsRepository):
         else:
             # Add a new task
             self.db_session.add(level)
-        self.db_session.commit()
 
     def saveSkill(self, employeeSkill: EmployeeSkill) -> None:
         existing_level = self.get_employee_skill(employeeSkill.skill_id, employeeSkill.user_id)
@@ -71,7 +127,6 @@ class PostgresLevelsRepository(LevelsRepository):
         else:
             # Add a new task
             self.db_session.add(employeeSkill)
-        self.db_session.commit()
 
     def get_task(self, task_id: UUID) -> AvailableTask:
         query = select(AvailableTask).where(AvailableTask.id==task_id)
@@ -96,8 +151,18 @@ class PostgresLevelsRepository(LevelsRepository):
     def create_employee_skill(self, skill_in: EmployeeSkillCreate) -> EmployeeSkill:
         db_skill = EmployeeSkill.model_validate(skill_in)
         self.db_session.add(db_skill)
-        self.db_session.commit()
         return db_skill
+
+    def grant_xp(self, grants: List[XpGrant]) -> List[GrantedXp]:
+        if not grants:
+            return []
+        result = self.db_session.execute(GRANT_XP_SQL, {
+            "employee_ids": [grant.employee_id for grant in grants],
+            "task_ids": [grant.task_id for grant in grants],
+            "level_thresholds": level_xp_thresholds,
+            "skill_thresholds": skill_xp_thresholds,
+        })
+        return [GrantedXp(employee_id=row.employee_id, skill_id=row.skill_id, level=row.level, xp=row.xp) for row in result]
     
     # def save_event(self, event: TaskEvent) -> None:
     #     # Convert the event to a dict representation if needed
@@ -26,9 +26,22 @@ skill_xp_requirements = {
     10: 20000     # 8-12 months (36-48 months total)
 }
 
+# Precomputed for the SQL grant path, index i holds the XP needed to reach level i
+level_xp_thresholds = [level_xp_requirements[level] for level in sorted(level_xp_requirements)]
+skill_xp_thresholds = [skill_xp_requirements[level] for level in sorted(skill_xp_requirements)]
+
+
+def add_xp(level: int, xp: int, gained: int, thresholds: list[int]) -> tuple[int, int]:
+    # Same rules as GRANT_XP_SQL: at most one level per grant and XP restarts at 0 on a level up
+    xp += gained
+    if level + 1 < len(thresholds) and xp >= thresholds[level + 1]:
+        return level + 1, 0
+    return level, xp
+
+
 #         #TODO: Assign rewards, XP, Level-Up, etc.
 #         #function nextLevel(level) - BASED ON D&D
 #         #return 500 * (level ^ 2) - (500 * level)
 #         #local exponent = 1.5
 #         #local baseXP = 1000
-#         #return math.floor(baseXP * (level ^ exponent))
\ No newline at end of file
+#         #return math.floor(baseXP * (level ^ exponent))
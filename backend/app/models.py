@@ -2,14 +2,15 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID, uuid4
 from app.api.users.users_models import UserBase
+from app.core.ids import new_id
 from app.api.users.skills_models import SkillBase
 from sqlmodel import Field, Relationship, SQLModel
 from sqlalchemy.orm import RelationshipProperty
-from sqlalchemy import Enum, PrimaryKeyConstraint
+from sqlalchemy import DDL, JSON, BigInteger, Column, Enum, Identity, Index, PrimaryKeyConstraint, event, text
 
 # Database model, database table inferred from class name
 class User(UserBase, table=True):
-    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    id: UUID = Field(default_factory=new_id, primary_key=True)
     hashed_password: str
     items: list["Item"] = Relationship(back_populates="owner", cascade_delete=True)
     company: "Company" = Relationship(back_populates="employees")
@@ -241,7 +242,7 @@ class EmployeeTaskBase(SQLModel):
 
 # Database model, database table inferred from class name
 class EmployeeTask(EmployeeTaskBase, table=True):
-    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    id: UUID = Field(default_factory=new_id, primary_key=True)
     assigned_to_id: UUID = Field(
         foreign_key="user.id", nullable=False, ondelete="CASCADE"
     )
@@ -265,15 +266,87 @@ class EmployeeTask(EmployeeTaskBase, table=True):
     # )
 
 class TaskEvent(SQLModel, table=True):
-    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    # Range partitioned by month, see app/tasks/task_partitions.py. Postgres can't enforce
+    # uniqueness across partitions, so (aggregate_id, version) is a plain index and the
+    # version check on employeetask is what rejects concurrent writers.
+    __table_args__ = (
+        Index("ix_taskevent_aggregate_id_version", "aggregate_id", "version"),
+        Index("ix_taskevent_sequence", "sequence"),
+        Index("ix_taskevent_timestamp_brin", "timestamp", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
+
+    id: UUID = Field(default_factory=new_id, primary_key=True)
     aggregate_id: UUID
-    timestamp: datetime
+    # Partition key, part of the primary key as Postgres requires
+    timestamp: datetime = Field(primary_key=True)
     version: int
     event_type: str = Field(max_length=100)
     assigned_to_id: UUID| None
     task_id: UUID| None
     reason: str| None = Field(default=None, max_length=500)
     approved_by_id: UUID | None
+    title: str | None = Field(default=None, max_length=500)
+    description: str | None = Field(default=None, max_length=500)
+    requires_approval: bool | None = None
+    # Global order of the store, the event feed pages on it
+    sequence: int | None = Field(default=None, sa_column=Column(BigInteger, Identity(), nullable=False))
+    # Writing transaction, the feed only returns events of transactions older than every running one
+    transaction_id: int | None = Field(
+        default=None, sa_column=Column(BigInteger, nullable=False, server_default=text("pg_current_xact_id()::text::bigint"))
+    )
+
+class TaskEventFeed(SQLModel):
+    data: list[TaskEvent]
+    # Sequence to pass as after on the next call
+    next_cursor: int
+
+# Wakes long-polling feed readers, identical notifications of one transaction are delivered once
+TASK_EVENT_CHANNEL = "taskevent"
+task_event_notify_ddl = [
+    DDL(f"""
+        CREATE OR REPLACE FUNCTION notify_taskevent() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('{TASK_EVENT_CHANNEL}', '');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """),
+    DDL("CREATE TRIGGER taskevent_notify AFTER INSERT ON taskevent FOR EACH STATEMENT EXECUTE FUNCTION notify_taskevent()"),
+]
+# Rows outside every monthly partition land here until their month is created
+task_event_default_partition_ddl = DDL("CREATE TABLE taskevent_default PARTITION OF taskevent DEFAULT")
+for ddl in [task_event_default_partition_ddl, *task_event_notify_ddl]:
+    event.listen(TaskEvent.__table__, "after_create", ddl)
+
+class TaskSnapshot(SQLModel, table=True):
+    # Latest folded state of an aggregate, rehydration replays only the events after it
+    aggregate_id: UUID = Field(primary_key=True)
+    version: int
+    state: dict = Field(sa_column=Column(JSON, nullable=False))
+    created_at: datetime = Field(default_factory=datetime.now, nullable=False)
+
+class ArchivedTask(SQLModel, table=True):
+    # Tasks moved to the cold archive, points reads at the segment file holding them
+    aggregate_id: UUID = Field(primary_key=True)
+    assigned_to_id: UUID = Field(foreign_key="user.id", nullable=False, ondelete="CASCADE", index=True)
+    segment: str = Field(max_length=100)
+    archived_at: datetime = Field(default_factory=datetime.now, nullable=False)
+
+class OutboxMessage(SQLModel, table=True):
+    # Side effects of an event, written in the event's transaction and handled later by the dispatcher
+    __table_args__ = (
+        Index("ix_outboxmessage_pending", "available_at", postgresql_where=text("processed_at IS NULL")),
+    )
+
+    id: UUID = Field(default_factory=new_id, primary_key=True)
+    topic: str = Field(max_length=100)
+    payload: dict = Field(sa_column=Column(JSON, nullable=False))
+    created_at: datetime = Field(default_factory=datetime.now, nullable=False)
+    available_at: datetime = Field(default_factory=datetime.now, nullable=False)
+    attempts: int = Field(default=0, nullable=False)
+    last_error: str | None = Field(default=None, max_length=500)
+    processed_at: datetime | None = None
 
 # Properties to receive on item creation
 class AvailableTaskCreate(AvailableTaskBase):
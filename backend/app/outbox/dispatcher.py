@@ -0,0 +1,96 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import Engine
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models import OutboxMessage
+from app.outbox.handlers import OutboxHandler, outbox_handlers
+from app.outbox.outbox_repository import PostgresOutboxRepository
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRY_DELAY = timedelta(minutes=5)
+
+
+class OutboxDispatcher:
+    """
+    Hands claimed outbox messages to the handlers registered for their topic.
+    Handler writes and the processed marks commit together. A failing batch is
+    retried one message at a time, so a single bad message is rescheduled with
+    backoff and the rest still go through.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        handlers: Optional[Dict[str, List[OutboxHandler]]] = None,
+        batch_size: int = settings.OUTBOX_BATCH_SIZE,
+        max_attempts: int = settings.OUTBOX_MAX_ATTEMPTS,
+        poll_interval: float = settings.OUTBOX_POLL_INTERVAL,
+    ):
+        self.engine = engine
+        self.handlers = outbox_handlers if handlers is None else handlers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+
+    def _handle(self, session: Session, topic: str, messages: List[OutboxMessage]) -> None:
+        handlers = self.handlers.get(topic)
+        if not handlers:
+            raise LookupError(f"No outbox handler registered for {topic}")
+        with session.begin_nested():
+            for handler in handlers:
+                handler(session, [message.payload for message in messages])
+
+    def _handle_one_by_one(self, session: Session, topic: str, messages: List[OutboxMessage]) -> List[tuple]:
+        failed = []
+        for message in messages:
+            try:
+                self._handle(session, topic, [message])
+            except Exception as error:
+                logger.exception("Outbox message %s (%s) failed", message.id, topic)
+                failed.append((message, error))
+        return failed
+
+    def dispatch_once(self) -> int:
+        with Session(self.engine) as session:
+            repository = PostgresOutboxRepository(session)
+            messages = repository.claim(self.batch_size, self.max_attempts)
+            by_topic: Dict[str, List[OutboxMessage]] = defaultdict(list)
+            for message in messages:
+                by_topic[message.topic].append(message)
+
+            failed = []
+            for topic, batch in by_topic.items():
+                if len(batch) == 1:
+                    failed.extend(self._handle_one_by_one(session, topic, batch))
+                    continue
+                try:
+                    self._handle(session, topic, batch)
+                except Exception:
+                    logger.warning("Outbox batch of %s %s failed, retrying one by one", len(batch), topic)
+                    failed.extend(self._handle_one_by_one(session, topic, batch))
+
+            failed_ids = {message.id for message, _ in failed}
+            repository.mark_processed([message for message in messages if message.id not in failed_ids])
+            for message, error in failed:
+                delay = min(timedelta(seconds=2 ** message.attempts), MAX_RETRY_DELAY)
+                repository.mark_failed(message, repr(error), datetime.now() + delay)
+            session.commit()
+        return len(messages)
+
+    async def run(self) -> None:
+        # Drains the outbox while there is work and polls when it runs dry
+        while True:
+            try:
+                dispatched = await asyncio.to_thread(self.dispatch_once)
+            except Exception:
+                logger.exception("Outbox dispatch failed")
+                dispatched = 0
+            if dispatched < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,13 @@
+from typing import Callable, Dict, List
+
+from sqlmodel import Session
+
+from app.levels.levels_handlers import grant_completed_tasks_xp
+
+# A handler gets the dispatcher's session and the payloads of one topic. It must
+# not commit, the dispatcher commits its writes together with marking the messages done.
+OutboxHandler = Callable[[Session, List[dict]], None]
+
+outbox_handlers: Dict[str, List[OutboxHandler]] = {
+    "TaskCompletedEvent": [grant_completed_tasks_xp],
+}
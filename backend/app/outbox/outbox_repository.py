@@ -0,0 +1,61 @@
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from app.models import OutboxMessage
+
+
+class OutboxRepository:
+    # Messages are staged in the caller's transaction, like every other repository write
+    def add(self, topic: str, payload: dict) -> None:
+        raise NotImplementedError
+
+    def claim(self, batch_size: int, max_attempts: int) -> List[OutboxMessage]:
+        raise NotImplementedError
+
+    def mark_processed(self, messages: List[OutboxMessage]) -> None:
+        raise NotImplementedError
+
+    def mark_failed(self, message: OutboxMessage, error: str, retry_at: datetime) -> None:
+        raise NotImplementedError
+
+
+class PostgresOutboxRepository(OutboxRepository):
+    def __init__(self, db_session: Session):
+        self.db_session = db_session
+
+    def add(self, topic: str, payload: dict) -> None:
+        self.db_session.add(OutboxMessage(topic=topic, payload=payload))
+
+    def claim(self, batch_size: int, max_attempts: int) -> List[OutboxMessage]:
+        # Rows stay locked until the claiming transaction ends, other dispatchers skip them
+        query = (
+            select(OutboxMessage)
+            .where(
+                OutboxMessage.processed_at.is_(None),
+                OutboxMessage.available_at <= datetime.now(),
+                OutboxMessage.attempts < max_attempts,
+            )
+            .order_by(OutboxMessage.available_at, OutboxMessage.created_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        return list(self.db_session.exec(query).all())
+
+    def mark_processed(self, messages: List[OutboxMessage]) -> None:
+        if not messages:
+            return
+        self.db_session.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_([message.id for message in messages]))
+            .values(processed_at=datetime.now())
+        )
+
+    def mark_failed(self, message: OutboxMessage, error: str, retry_at: datetime) -> None:
+        self.db_session.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id == message.id)
+            .values(attempts=OutboxMessage.attempts + 1, last_error=error[:500], available_at=retry_at)
+        )
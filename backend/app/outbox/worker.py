@@ -0,0 +1,21 @@
+import asyncio
+import logging
+
+from app.core.db import engine
+from app.outbox.dispatcher import OutboxDispatcher
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    # Standalone dispatcher, set OUTBOX_IN_PROCESS_DISPATCHER=false on the API when running this
+    logger.info("Starting outbox dispatcher")
+    try:
+        asyncio.run(OutboxDispatcher(engine).run())
+    except KeyboardInterrupt:
+        logger.info("Outbox dispatcher stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Rebuilds EmployeeTask, EmployeeLevel and EmployeeSkill from the taskevent stream.
+
+Aggregates are split into partitions by a hash of their assignee, so each
+employee's tasks and XP are rebuilt by a single worker. Each worker streams
+its events through a server-side cursor, folds them with the apply_event
+handlers and writes only the rows that differ, in one transaction per
+partition. Run it while the API is not accepting task commands.
+
+    python app/replay.py --workers 8 --dry-run
+"""
+import argparse
+import logging
+import math
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from itertools import groupby
+from typing import Dict, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import ARRAY, Uuid, String, any_, bindparam, cast, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.levels.levels_requirements import add_xp, level_xp_thresholds, skill_xp_thresholds
+from app.models import AvailableTask, EmployeeLevel, EmployeeSkill, EmployeeTask, TaskEvent, User
+from app.tasks.task_models import TaskCompletedEvent
+from app.tasks.task_rehydration import fold
+from app.tasks.task_repository import to_domain_event
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STREAM_BATCH_SIZE = 5000
+WRITE_BATCH_SIZE = 1000
+
+events_table = TaskEvent.__table__
+tasks_table = EmployeeTask.__table__
+levels_table = EmployeeLevel.__table__
+skills_table = EmployeeSkill.__table__
+task_columns = [column.name for column in tasks_table.columns]
+
+
+@dataclass
+class PartitionResult:
+    partition: int
+    events: int = 0
+    aggregates: int = 0
+    tasks_changed: int = 0
+    tasks_skipped: int = 0
+    levels_changed: int = 0
+    skills_changed: int = 0
+    diffs: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+
+def _ids_param(ids):
+    return any_(bindparam("ids", list(ids), type_=ARRAY(Uuid)))
+
+
+def _stream_partition(connection, partition: int, partitions: int):
+    # Every aggregate starts with TaskAssignedEvent, its assignee decides the partition
+    in_partition = select(events_table.c.aggregate_id).where(
+        (events_table.c.event_type == "TaskAssignedEvent")
+        & (func.abs(func.mod(func.hashtext(cast(events_table.c.assigned_to_id, String)), partitions)) == partition)
+    )
+    query = (
+        select(events_table)
+        .where(events_table.c.aggregate_id.in_(in_partition))
+        .order_by(events_table.c.aggregate_id, events_table.c.version)
+    )
+    return connection.execution_options(stream_results=True, yield_per=STREAM_BATCH_SIZE).execute(query)
+
+
+def _record_diff(result: PartitionResult, message: str, max_diffs: int) -> None:
+    if len(result.diffs) < max_diffs:
+        result.diffs.append(message)
+
+
+def _replay_tasks(session: Session, rows: List[dict], result: PartitionResult, dry_run: bool, max_diffs: int) -> None:
+    stored = {
+        row.id: row
+        for row in session.execute(select(tasks_table).where(tasks_table.c.id == _ids_param(row["id"] for row in rows)))
+    }
+    changed = []
+    for row in rows:
+        current = stored.get(row["id"])
+        if current is None:
+            # Rows removed with their employee or available task stay removed
+            result.tasks_skipped += 1
+            continue
+        columns = [column for column in task_columns if getattr(current, column) != row[column]]
+        if columns:
+            details = ", ".join(f"{column} {getattr(current, column)!r} -> {row[column]!r}" for column in columns)
+            _record_diff(result, f"task {row['id']}: {details}", max_diffs)
+            changed.append(row)
+
+    result.tasks_changed += len(changed)
+    if changed and not dry_run:
+        session.execute(
+            update(tasks_table)
+            .where(tasks_table.c.id == bindparam("b_id"))
+            .values({column: bindparam(column) for column in task_columns if column != "id"}),
+            [{"b_id": row["id"], **row} for row in changed],
+        )
+
+
+def _replay_xp(
+    session: Session,
+    completions: Dict[UUID, List[Tuple]],
+    employee_ids: set,
+    result: PartitionResult,
+    dry_run: bool,
+    max_diffs: int,
+) -> None:
+    # Employees deleted since their tasks were recorded have nothing left to rebuild
+    employee_ids = set(session.scalars(select(User.id).where(User.id == _ids_param(employee_ids))))
+    rewards = {
+        row.id: row
+        for row in session.execute(select(AvailableTask.id, AvailableTask.skill_id, AvailableTask.person_xp, AvailableTask.skill_xp))
+    }
+    levels = {
+        row.employee_id: row
+        for row in session.execute(
+            select(levels_table.c.employee_id, levels_table.c.level, levels_table.c.xp, levels_table.c.xp_multiplier)
+            .where(levels_table.c.employee_id == _ids_param(employee_ids))
+        )
+    }
+    stored_skills = {
+        (row.user_id, row.skill_id): (row.level, row.xp)
+        for row in session.execute(select(skills_table).where(skills_table.c.user_id == _ids_param(employee_ids)))
+    }
+
+    level_updates = []
+    skills: Dict[Tuple[UUID, UUID], Tuple[int, int]] = {}
+    for employee_id in employee_ids:
+        employee = levels.get(employee_id)
+        level, xp = 0, 0
+        # Grants are applied one completion at a time, in the order they happened
+        for _, task_id in sorted(completions.get(employee_id, [])):
+            reward = rewards.get(task_id)
+            if reward is None:
+                continue
+            key = (employee_id, reward.skill_id)
+            skills[key] = add_xp(*skills.get(key, (0, 0)), reward.skill_xp, skill_xp_thresholds)
+            # Like the live grant, employees without a level row only collect skill XP
+            if employee is not None:
+                level, xp = add_xp(level, xp, math.floor(reward.person_xp * employee.xp_multiplier), level_xp_thresholds)
+        if employee is not None and (level, xp) != (employee.level, employee.xp):
+            _record_diff(result, f"level {employee_id}: {(employee.level, employee.xp)} -> {(level, xp)}", max_diffs)
+            level_updates.append({"b_employee_id": employee_id, "level": level, "xp": xp})
+
+    # Skills nobody earned XP for in the stream go back to zero
+    for key in stored_skills.keys() - skills.keys():
+        skills[key] = (0, 0)
+    skill_updates = []
+    for (user_id, skill_id), (level, xp) in skills.items():
+        if stored_skills.get((user_id, skill_id)) != (level, xp):
+            _record_diff(result, f"skill {user_id}/{skill_id}: {stored_skills.get((user_id, skill_id))} -> {(level, xp)}", max_diffs)
+            skill_updates.append({"user_id": user_id, "skill_id": skill_id, "level": level, "xp": xp})
+
+    result.levels_changed += len(level_updates)
+    result.skills_changed += len(skill_updates)
+    if dry_run:
+        return
+    if level_updates:
+        session.execute(
+            update(levels_table)
+            .where(levels_table.c.employee_id == bindparam("b_employee_id"))
+            .values(level=bindparam("level"), xp=bindparam("xp"), updated_at=func.localtimestamp()),
+            level_updates,
+        )
+    if skill_updates:
+        statement = pg_insert(skills_table)
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[skills_table.c.user_id, skills_table.c.skill_id],
+                set_={"level": statement.excluded.level, "xp": statement.excluded.xp},
+            ),
+            skill_updates,
+        )
+
+
+def replay_partition(partition: int, partitions: int, dry_run: bool = False, max_diffs: int = 20) -> PartitionResult:
+    result = PartitionResult(partition=partition)
+    started = time.perf_counter()
+    completions: Dict[UUID, List[Tuple]] = defaultdict(list)
+    employee_ids = set()
+
+    with engine.connect() as reader, Session(engine) as session:
+        rows = _stream_partition(reader, partition, partitions)
+        pending = []
+        for _, aggregate_events in groupby(rows, key=lambda row: row.aggregate_id):
+            events = [to_domain_event(row) for row in aggregate_events]
+            task = fold(events)
+            result.events += len(events)
+            result.aggregates += 1
+            employee_ids.add(task.assigned_to_id)
+            for event in events:
+                if isinstance(event, TaskCompletedEvent):
+                    completions[event.assigned_to_id].append((event.timestamp, event.task_id))
+
+            pending.append({column: getattr(task, column) for column in task_columns})
+            if len(pending) >= WRITE_BATCH_SIZE:
+                _replay_tasks(session, pending, result, dry_run, max_diffs)
+                pending = []
+        if pending:
+            _replay_tasks(session, pending, result, dry_run, max_diffs)
+
+        _replay_xp(session, completions, employee_ids, result, dry_run, max_diffs)
+        if dry_run:
+            session.rollback()
+        else:
+            session.commit()
+
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def _init_worker() -> None:
+    # Forked workers must not reuse the parent's pooled connections
+    engine.dispose(close=False)
+
+
+def replay(workers: int, partitions: int, dry_run: bool, max_diffs: int) -> List[PartitionResult]:
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(replay_partition, partition, partitions, dry_run, max_diffs) for partition in range(partitions)]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            logger.info(
+                "Partition %s done (%s/%s): %s events, %s tasks, %.0f events/s",
+                result.partition, len(results), partitions, result.events, result.aggregates,
+                result.events / result.elapsed if result.elapsed else 0,
+            )
+
+    elapsed = time.perf_counter() - started
+    events = sum(result.events for result in results)
+    logger.info(
+        "Replayed %s events of %s tasks in %.1fs (%.0f events/s)",
+        events, sum(result.aggregates for result in results), elapsed, events / elapsed if elapsed else 0,
+    )
+    logger.info(
+        "%s tasks, %s levels and %s skills %s, %s tasks without a row skipped",
+        sum(result.tasks_changed for result in results),
+        sum(result.levels_changed for result in results),
+        sum(result.skills_changed for result in results),
+        "differ" if dry_run else "rewritten",
+        sum(result.tasks_skipped for result in results),
+    )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--partitions", type=int, default=None, help="defaults to 4 per worker")
+    parser.add_argument("--dry-run", action="store_true", help="report differences without writing")
+    parser.add_argument("--max-diffs", type=int, default=20, help="differences listed per partition")
+    args = parser.parse_args()
+
+    results = replay(args.workers, args.partitions or args.workers * 4, args.dry_run, args.max_diffs)
+    if args.dry_run:
+        for result in sorted(results, key=lambda result: result.partition):
+            for diff in result.diffs:
+                logger.info(diff)
+
+
+if __name__ == "__main__":
+    main()
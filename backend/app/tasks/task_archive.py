@@ -0,0 +1,201 @@
+"""
+Cold archive for finished tasks.
+
+    python -m app.tasks.task_archive --older-than-days 180
+
+A segment is a pair of files. <name>.jsonl.gz holds one JSON line per task,
+with the task row and its events, sorted by task id. Every BLOCK_SIZE lines go
+into their own gzip member. <name>.idx.json lists the first task id and the
+byte range of each member. A lookup bisects that index and inflates a single
+member of the memory-mapped file. ArchivedTask rows point each archived task
+at its segment.
+"""
+import argparse
+import bisect
+import gzip
+import json
+import logging
+import mmap
+import os
+import threading
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import ARRAY, Uuid, any_, bindparam, delete, func, insert, select
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models import ArchivedTask, EmployeeTask, TaskEvent, TaskSnapshot, TaskStatus
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BLOCK_SIZE = 64
+BATCH_SIZE = 5000
+
+
+def _row_state(row) -> dict:
+    return jsonable_encoder({column.name: getattr(row, column.name, None) for column in type(row).__table__.columns})
+
+
+class ArchiveSegment:
+    def __init__(self, data_path: Path):
+        self.data_path = data_path
+        index = json.loads(data_path.with_name(data_path.name.replace(".jsonl.gz", ".idx.json")).read_text())
+        self.first_ids: List[str] = [block["first"] for block in index["blocks"]]
+        self.ranges = [(block["offset"], block["length"]) for block in index["blocks"]]
+        self._file = open(data_path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def find(self, aggregate_id: UUID) -> Optional[dict]:
+        key = str(aggregate_id)
+        block = bisect.bisect_right(self.first_ids, key) - 1
+        if block < 0:
+            return None
+        offset, length = self.ranges[block]
+        for line in gzip.decompress(self._map[offset:offset + length]).splitlines():
+            record = json.loads(line)
+            if record["task"]["id"] == key:
+                return record
+        return None
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+
+class TaskArchive:
+    """
+    Reads and writes the segment files of a directory. Segments are opened on
+    first use and stay mapped, the OS page cache keeps hot blocks in memory.
+    """
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segments: Dict[str, ArchiveSegment] = {}
+        self.lock = threading.Lock()
+
+    def _segment(self, name: str) -> ArchiveSegment:
+        with self.lock:
+            if name not in self.segments:
+                self.segments[name] = ArchiveSegment(self.directory / f"{name}.jsonl.gz")
+            return self.segments[name]
+
+    def get_task(self, segment: str, aggregate_id: UUID) -> Optional[EmployeeTask]:
+        record = self._segment(segment).find(aggregate_id)
+        return EmployeeTask.model_validate(record["task"]) if record else None
+
+    def get_events(self, segment: str, aggregate_id: UUID) -> List[TaskEvent]:
+        record = self._segment(segment).find(aggregate_id)
+        return [TaskEvent.model_validate(event) for event in record["events"]] if record else []
+
+    def write_segment(self, name: str, records: List[dict]) -> None:
+        # Written under temporary names and renamed, a crash never leaves half a segment behind
+        records = sorted(records, key=lambda record: record["task"]["id"])
+        data_path = self.directory / f"{name}.jsonl.gz"
+        index_path = self.directory / f"{name}.idx.json"
+        blocks = []
+        with open(f"{data_path}.tmp", "wb") as data:
+            for start in range(0, len(records), BLOCK_SIZE):
+                chunk = records[start:start + BLOCK_SIZE]
+                member = gzip.compress("".join(json.dumps(record) + "\n" for record in chunk).encode())
+                blocks.append({"first": chunk[0]["task"]["id"], "offset": data.tell(), "length": len(member)})
+                data.write(member)
+            data.flush()
+            os.fsync(data.fileno())
+        with open(f"{index_path}.tmp", "w") as index:
+            json.dump({"blocks": blocks}, index)
+            index.flush()
+            os.fsync(index.fileno())
+        os.replace(f"{index_path}.tmp", index_path)
+        os.replace(f"{data_path}.tmp", data_path)
+
+    def close(self) -> None:
+        with self.lock:
+            for segment in self.segments.values():
+                segment.close()
+            self.segments.clear()
+
+
+@lru_cache
+def get_task_archive() -> Optional[TaskArchive]:
+    return TaskArchive(settings.TASK_ARCHIVE_DIR) if settings.TASK_ARCHIVE_DIR else None
+
+
+class TaskArchiver:
+    """
+    Moves completed and cancelled tasks finished before a cutoff, with their
+    events and snapshots, into a new segment per batch. The rows are deleted in
+    the transaction that records ArchivedTask, after the segment is on disk.
+    """
+
+    def __init__(self, db_session: Session, archive: TaskArchive):
+        self.db_session = db_session
+        self.archive = archive
+
+    def archive_batch(self, cutoff: datetime, batch_size: int = BATCH_SIZE) -> int:
+        finished_at = func.coalesce(EmployeeTask.completed_at, EmployeeTask.created_at)
+        tasks = self.db_session.execute(
+            select(EmployeeTask)
+            .where(
+                EmployeeTask.status.in_([TaskStatus.COMPLETED, TaskStatus.CANCELED]),
+                finished_at < cutoff,
+            )
+            .order_by(EmployeeTask.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+        if not tasks:
+            return 0
+
+        ids = [task.id for task in tasks]
+        ids_param = any_(bindparam("ids", ids, type_=ARRAY(Uuid)))
+        events: Dict[UUID, List[dict]] = {task_id: [] for task_id in ids}
+        for event in self.db_session.execute(
+            select(TaskEvent).where(TaskEvent.aggregate_id == ids_param).order_by(TaskEvent.aggregate_id, TaskEvent.version)
+        ).scalars():
+            events[event.aggregate_id].append(_row_state(event))
+
+        name = f"segment-{datetime.now():%Y%m%d%H%M%S%f}"
+        self.archive.write_segment(name, [{"task": _row_state(task), "events": events[task.id]} for task in tasks])
+
+        self.db_session.execute(
+            insert(ArchivedTask),
+            [{"aggregate_id": task.id, "assigned_to_id": task.assigned_to_id, "segment": name} for task in tasks],
+        )
+        self.db_session.execute(delete(TaskEvent).where(TaskEvent.aggregate_id == ids_param))
+        self.db_session.execute(delete(TaskSnapshot).where(TaskSnapshot.aggregate_id == ids_param))
+        self.db_session.execute(delete(EmployeeTask).where(EmployeeTask.id == ids_param))
+        logger.info("Archived %s tasks into %s", len(tasks), name)
+        return len(tasks)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--older-than-days", type=int, default=settings.TASK_ARCHIVE_RETENTION_DAYS)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    archive = get_task_archive()
+    if archive is None:
+        parser.error("TASK_ARCHIVE_DIR is not set")
+    cutoff = datetime.now() - timedelta(days=args.older_than_days)
+    total = 0
+    with Session(engine) as session:
+        while True:
+            archived = TaskArchiver(session, archive).archive_batch(cutoff, args.batch_size)
+            session.commit()
+            total += archived
+            if archived < args.batch_size:
+                break
+    logger.info("Archived %s tasks finished before %s", total, cutoff)
+
+
+if __name__ == "__main__":
+    main()
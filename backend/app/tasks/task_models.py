@@ -1,6 +1,7 @@
 from datetime import datetime
-from uuid import UUID, uuid4
+from uuid import UUID
 from dataclasses import dataclass
+from app.core.ids import new_id
 from app.models import TaskStatus
 
 #region Domain Events
@@ -14,6 +15,10 @@ class TaskEventDomain:
 class TaskAssignedEvent(TaskEventDomain):
     assigned_to_id: UUID
     task_id: UUID
+    # Carried on the event so the task can be rebuilt from its stream alone
+    title: str | None = None
+    description: str | None = None
+    requires_approval: bool = False
 
 @dataclass
 class TaskCompletedEvent(TaskEventDomain):
@@ -48,6 +53,22 @@ class AssignTaskCommand:
     description: str
     requires_approval: bool
 
+@dataclass
+class BulkAssignTaskCommand:
+    task_id: UUID
+    # Exactly one selector: explicit employees, a whole department or a whole company
+    assigned_to_ids: list[UUID] | None = None
+    department_id: UUID | None = None
+    company_id: UUID | None = None
+
+@dataclass
+class BatchCommand:
+    aggregate_ids: list[UUID]
+
+@dataclass
+class BatchRejectCommand(BatchCommand):
+    reason: str
+
 @dataclass
 class SubmitTaskCommand(Command):
     pass
@@ -85,13 +106,16 @@ class EmployeeTaskDomain:
 
     @classmethod
     def create(cls, command: AssignTaskCommand) -> tuple['EmployeeTaskDomain', TaskAssignedEvent]:
-        id = uuid4()
+        id = new_id()
         event = TaskAssignedEvent(
             aggregate_id=id,
             task_id = command.task_id,
             assigned_to_id=command.assigned_to_id,
             timestamp=datetime.now(),
-            version=1
+            version=1,
+            title=command.title,
+            description=command.description,
+            requires_approval=command.requires_approval
         )
         task = cls(id=id, 
                    task_id=command.task_id, 
@@ -0,0 +1,126 @@
+"""
+Monthly partitions of taskevent.
+
+    python -m app.tasks.task_partitions ensure --months-ahead 3
+    python -m app.tasks.task_partitions detach --before 2025-01
+"""
+import argparse
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import List
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.core.db import engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PARENT = "taskevent"
+DEFAULT_PARTITION = "taskevent_default"
+PARTITION_NAME = re.compile(r"^taskevent_y(\d{4})m(\d{2})$")
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_y{month.year:04d}m{month.month:02d}"
+
+
+@dataclass
+class TaskEventPartition:
+    name: str
+    month: date
+
+
+class TaskEventPartitions:
+    """
+    Creates and detaches the monthly partitions of taskevent. New months get
+    their own partition ahead of time. Rows that already landed in the default
+    partition for a month are moved into the month's partition when it is
+    created. Detached partitions become plain tables that can be dumped and
+    dropped.
+    """
+
+    def __init__(self, db_session: Session):
+        self.db_session = db_session
+
+    def list(self) -> List[TaskEventPartition]:
+        names = self.db_session.execute(text("""
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = :parent
+        """), {"parent": PARENT}).scalars()
+        partitions = []
+        for name in names:
+            match = PARTITION_NAME.match(name)
+            if match:
+                partitions.append(TaskEventPartition(name=name, month=date(int(match[1]), int(match[2]), 1)))
+        return sorted(partitions, key=lambda partition: partition.month)
+
+    def create(self, month: date) -> bool:
+        month = month_start(month)
+        name = partition_name(month)
+        if any(partition.name == name for partition in self.list()):
+            return False
+        bounds = {"start": month, "end": add_months(month, 1)}
+        # Built standalone and attached, the default partition may already hold rows of this month
+        self.db_session.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS)"))
+        moved = self.db_session.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """), bounds).rowcount
+        self.db_session.execute(text(
+            f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+        ))
+        logger.info("Created partition %s, moved %s events from the default partition", name, moved)
+        return True
+
+    def ensure(self, start: date, months: int) -> List[str]:
+        month = month_start(start)
+        return [partition_name(add_months(month, offset)) for offset in range(months) if self.create(add_months(month, offset))]
+
+    def detach(self, before: date) -> List[str]:
+        # Partitions whose whole month is before the given date
+        detached = []
+        for partition in self.list():
+            if add_months(partition.month, 1) <= before:
+                self.db_session.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {partition.name}"))
+                logger.info("Detached partition %s", partition.name)
+                detached.append(partition.name)
+        return detached
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    ensure = commands.add_parser("ensure", help="create partitions from this month on")
+    ensure.add_argument("--months-ahead", type=int, default=3)
+    detach = commands.add_parser("detach", help="detach partitions of months before a date")
+    detach.add_argument("--before", type=lambda value: date.fromisoformat(f"{value}-01"), required=True, help="YYYY-MM")
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        partitions = TaskEventPartitions(session)
+        if args.command == "ensure":
+            partitions.ensure(date.today(), args.months_ahead + 1)
+        else:
+            partitions.detach(args.before)
+        session.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+from typing import Iterable, Optional
+from uuid import UUID
+
+from app.models import EmployeeTask
+from app.tasks.task_models import TaskEventDomain
+from app.tasks.task_repository import TaskRepository, task_from_state, to_domain_event
+from app.tasks.tasks_service import apply_event
+
+
+def fold(events: Iterable[TaskEventDomain], task: EmployeeTask | None = None) -> EmployeeTask | None:
+    # Replays events on top of a known state through the singledispatch handlers
+    for event in events:
+        task = apply_event(event, task)
+    return task
+
+
+class TaskRehydrator:
+    """
+    Rebuilds EmployeeTask aggregates from their event stream. Loading starts from
+    the latest snapshot and folds only the events recorded after it. Snapshots are
+    written by TaskService every TASK_SNAPSHOT_EVERY versions.
+    """
+
+    def __init__(self, repository: TaskRepository):
+        self.repository = repository
+
+    def load(self, aggregate_id: UUID) -> Optional[EmployeeTask]:
+        snapshot = self.repository.get_snapshot(aggregate_id)
+        task = task_from_state(snapshot.state) if snapshot else None
+        rows = self.repository.get_events(aggregate_id, after_version=snapshot.version if snapshot else 0)
+        return fold((to_domain_event(row) for row in rows), task)
@@ -1,10 +1,17 @@
+from datetime import datetime
 from functools import singledispatch
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional
 from uuid import UUID
+from fastapi.encoders import jsonable_encoder
 from requests import Session
-from sqlalchemy import select, insert
-from app.models import EmployeeTask, TaskEvent
-from app.tasks.task_models import TaskAssignedEvent, TaskCancelledEvent, TaskCompletedEvent, TaskRejectedEvent, TaskSubmittedEvent
+from sqlalchemy import ARRAY, Uuid, any_, bindparam, select, insert, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.models import ArchivedTask, AvailableTask, EmployeeTask, TaskEvent, TaskSnapshot, User
+from app.tasks.task_models import TaskAssignedEvent, TaskCancelledEvent, TaskCompletedEvent, TaskEventDomain, TaskRejectedEvent, TaskSubmittedEvent
+
+
+class ConcurrencyError(Exception):
+    """The aggregate was changed by someone else since it was loaded."""
 
 
 #region Repository Interface
@@ -17,7 +24,10 @@ def _(event: TaskAssignedEvent, event_data: dict):
     event_data.update({
         "assigned_to_id": event.assigned_to_id,
         "task_id": event.task_id,
-        "event_type": "TaskAssignedEvent"
+        "event_type": "TaskAssignedEvent",
+        "title": event.title,
+        "description": event.description,
+        "requires_approval": event.requires_approval
     })
 
 # Handle specific event types for additional fields
@@ -52,57 +62,241 @@ def _(event: TaskRejectedEvent, event_data: dict):
     })
 
 
+# Inverse of update_event_data, turns a stored row back into its domain event
+event_row_readers = {
+    "TaskAssignedEvent": lambda row: TaskAssignedEvent(
+        aggregate_id=row.aggregate_id, timestamp=row.timestamp, version=row.version,
+        assigned_to_id=row.assigned_to_id, task_id=row.task_id, title=row.title,
+        description=row.description, requires_approval=bool(row.requires_approval)
+    ),
+    "TaskSubmittedEvent": lambda row: TaskSubmittedEvent(
+        aggregate_id=row.aggregate_id, timestamp=row.timestamp, version=row.version
+    ),
+    "TaskCompletedEvent": lambda row: TaskCompletedEvent(
+        aggregate_id=row.aggregate_id, timestamp=row.timestamp, version=row.version,
+        assigned_to_id=row.assigned_to_id, task_id=row.task_id, approved_by_id=row.approved_by_id
+    ),
+    "TaskCancelledEvent": lambda row: TaskCancelledEvent(
+        aggregate_id=row.aggregate_id, timestamp=row.timestamp, version=row.version, reason=row.reason
+    ),
+    "TaskRejectedEvent": lambda row: TaskRejectedEvent(
+        aggregate_id=row.aggregate_id, timestamp=row.timestamp, version=row.version,
+        reason=row.reason, approved_by_id=row.approved_by_id
+    ),
+}
+
+def to_domain_event(row: TaskEvent) -> TaskEventDomain:
+    reader = event_row_readers.get(row.event_type)
+    if reader is None:
+        raise ValueError(f"Unhandled event type: {row.event_type}")
+    return reader(row)
+
+
+def task_to_state(task: EmployeeTask) -> dict:
+    # Every column is written, unset optional fields included, so the state validates back
+    return jsonable_encoder({column.name: getattr(task, column.name, None) for column in EmployeeTask.__table__.columns})
+
+def task_from_state(state: dict) -> EmployeeTask:
+    return EmployeeTask.model_validate(state)
+
+
+if TYPE_CHECKING:
+    from app.tasks.task_archive import TaskArchive
+
+
 class TaskRepository:
+    # Write methods only stage changes, committing is up to the unit of work
     def save(self, task: EmployeeTask) -> None:
         raise NotImplementedError
 
     def save_event(self, event: TaskEvent) -> None:
         raise NotImplementedError
 
+    def append(self, task: EmployeeTask, event: TaskEventDomain, expected_version: int) -> EmployeeTask:
+        raise NotImplementedError
+
+    def save_many(self, tasks: List[EmployeeTask], events: List[TaskEventDomain]) -> None:
+        raise NotImplementedError
+
+    def append_many(self, changes: List[tuple[EmployeeTask, TaskEventDomain, int]]) -> None:
+        raise NotImplementedError
+
+    def get_by_ids(self, ids: List[UUID]) -> List[EmployeeTask]:
+        raise NotImplementedError
+
+    def get_snapshot(self, aggregate_id: UUID) -> Optional[TaskSnapshot]:
+        raise NotImplementedError
+
+    def save_snapshot(self, task: EmployeeTask) -> None:
+        raise NotImplementedError
+
+    def get_available_task(self, task_id: UUID) -> Optional[AvailableTask]:
+        raise NotImplementedError
+
+    def get_assignee_ids(
+        self, company_id: UUID, assigned_to_ids: Optional[List[UUID]] = None, department_id: Optional[UUID] = None
+    ) -> List[UUID]:
+        raise NotImplementedError
+
     def get_by_id(self, task_id: UUID) -> Optional[EmployeeTask]:
         raise NotImplementedError
 
-    def get_events(self, task_id: UUID) -> List[TaskEvent]:
+    def get_events(self, task_id: UUID, after_version: int = 0) -> List[TaskEvent]:
+        raise NotImplementedError
+
+    def get_event_feed(self, after: int, limit: int) -> List[TaskEvent]:
+        raise NotImplementedError
+
+    def get_user_tasks(self, id: UUID) -> List[EmployeeTask]:
         raise NotImplementedError
 
 class PostgresTaskRepository(TaskRepository):
-    def __init__(self, db_session: Session):
+    def __init__(self, db_session: Session, archive: Optional["TaskArchive"] = None):
         self.db_session = db_session
+        # Reads of archived tasks fall through to the segment files
+        self.archive = archive
 
     def save(self, task: EmployeeTask) -> None:
-        existing_task = self.get_by_id(task.id)
-        if existing_task:
-            # Update the task
-            self.db_session.merge(task)
-        else:
-            # Add a new task
-            self.db_session.add(task)
-        self.db_session.commit()
+        # New aggregates only, existing ones are changed through append
+        self.db_session.add(task)
+
+    def append(self, task: EmployeeTask, event: TaskEventDomain, expected_version: int) -> EmployeeTask:
+        # Only update the row if nobody bumped its version since we loaded it
+        values = task.model_dump(exclude={"id", "version"})
+        query = (
+            update(EmployeeTask)
+            .where((EmployeeTask.id == task.id) & (EmployeeTask.version == expected_version))
+            .values(**values, version=expected_version + 1)
+            .returning(EmployeeTask)
+        )
+        result = self.db_session.execute(
+            query, execution_options={"populate_existing": True}
+        ).scalar_one_or_none()
+        if result is None:
+            raise ConcurrencyError(f"Task {task.id} was modified concurrently, expected version {expected_version}")
+
+        # The row lock taken above serialises writers of this aggregate, the event version is free
+        self.save_event(event)
+        return result
+
+    def append_many(self, changes: List[tuple[EmployeeTask, TaskEventDomain, int]]) -> None:
+        # Same check as append for every (task, event, expected_version). psycopg pipelines
+        # the executemany in one round trip and reports the summed row count.
+        if not changes:
+            return
+        table = EmployeeTask.__table__
+        query = update(table).where(
+            (table.c.id == bindparam("b_id")) & (table.c.version == bindparam("b_expected_version"))
+        )
+        rows = [
+            {
+                **task.model_dump(exclude={"id", "version"}),
+                "version": expected_version + 1,
+                "b_id": task.id,
+                "b_expected_version": expected_version,
+            }
+            for task, _, expected_version in changes
+        ]
+        result = self.db_session.execute(query, rows)
+        if result.rowcount != len(changes):
+            raise ConcurrencyError(f"{len(changes) - result.rowcount} of {len(changes)} tasks were modified concurrently")
+
+        self.db_session.execute(insert(TaskEvent), [self._event_data(event) for _, event, _ in changes])
 
     def save_event(self, event: TaskEvent) -> None:
-        # Convert the event to a dict representation if needed
+        self.db_session.execute(insert(TaskEvent).values(self._event_data(event)))
+
+    def save_many(self, tasks: List[EmployeeTask], events: List[TaskEventDomain]) -> None:
+        # executemany is sent as multi-row INSERTs, one per 1000 rows
+        if tasks:
+            self.db_session.execute(insert(EmployeeTask), [task.model_dump() for task in tasks])
+        if events:
+            self.db_session.execute(insert(TaskEvent), [self._event_data(event) for event in events])
+
+    def _event_data(self, event: TaskEventDomain) -> dict:
+        # Every optional column is present so events of any type can share one multi-row INSERT
         event_data = {
             "aggregate_id": event.aggregate_id,
             "timestamp": event.timestamp,
-            "version": event.version
+            "version": event.version,
+            "assigned_to_id": None,
+            "task_id": None,
+            "reason": None,
+            "approved_by_id": None,
         }
 
         # Call the handler
         update_event_data(event, event_data)
-        self.db_session.execute(insert(TaskEvent).values(event_data))
-        self.db_session.commit()
-        
+        return event_data
+
+    def get_available_task(self, task_id: UUID) -> Optional[AvailableTask]:
+        return self.db_session.get(AvailableTask, task_id)
+
+    def get_assignee_ids(
+        self, company_id: UUID, assigned_to_ids: Optional[List[UUID]] = None, department_id: Optional[UUID] = None
+    ) -> List[UUID]:
+        query = select(User.id).where((User.company_id == company_id) & (User.is_active == True))
+        if assigned_to_ids is not None:
+            query = query.where(User.id.in_(assigned_to_ids))
+        if department_id is not None:
+            query = query.where(User.department_id == department_id)
+        return list(self.db_session.execute(query).scalars().all())
+
     def get_by_id(self, id: UUID) -> Optional[EmployeeTask]:
         query = select(EmployeeTask).where(EmployeeTask.id==id)
         result = self.db_session.execute(query).scalar_one_or_none()
         return result
 
-    def get_events(self, id: UUID) -> List[TaskEvent]:
-        query = select(TaskEvent).filter_by(aggregate_id=id).order_by(TaskEvent.timestamp)
+    def get_by_ids(self, ids: List[UUID]) -> List[EmployeeTask]:
+        query = select(EmployeeTask).where(EmployeeTask.id == any_(bindparam("ids", ids, type_=ARRAY(Uuid))))
+        return list(self.db_session.execute(query).scalars().all())
+
+    def get_events(self, id: UUID, after_version: int = 0) -> List[TaskEvent]:
+        query = (
+            select(TaskEvent)
+            .where((TaskEvent.aggregate_id == id) & (TaskEvent.version > after_version))
+            .order_by(TaskEvent.version)
+        )
         result = self.db_session.execute(query).scalars().all()
+        if not result and self.archive is not None:
+            archived = self.db_session.get(ArchivedTask, id)
+            if archived is not None:
+                return [event for event in self.archive.get_events(archived.segment, id) if event.version > after_version]
         return result
     
+    def get_event_feed(self, after: int, limit: int) -> List[TaskEvent]:
+        # Sequences are taken at insert but become visible at commit, so a reader could
+        # see 11 before 10 commits and skip 10 for good. Events of transactions that may
+        # still be running are held back until every older transaction has finished.
+        query = (
+            select(TaskEvent)
+            .where(
+                (TaskEvent.sequence > after)
+                & (TaskEvent.transaction_id < text("pg_snapshot_xmin(pg_current_snapshot())::text::bigint"))
+            )
+            .order_by(TaskEvent.sequence)
+            .limit(limit)
+        )
+        return self.db_session.execute(query).scalars().all()
+
+    def get_snapshot(self, aggregate_id: UUID) -> Optional[TaskSnapshot]:
+        return self.db_session.get(TaskSnapshot, aggregate_id)
+
+    def save_snapshot(self, task: EmployeeTask) -> None:
+        query = pg_insert(TaskSnapshot).values(
+            aggregate_id=task.id, version=task.version, state=task_to_state(task), created_at=datetime.now()
+        )
+        query = query.on_conflict_do_update(
+            index_elements=[TaskSnapshot.aggregate_id],
+            set_={"version": query.excluded.version, "state": query.excluded.state, "created_at": query.excluded.created_at},
+            where=TaskSnapshot.version < query.excluded.version,
+        )
+        self.db_session.execute(query)
+
     def get_user_tasks(self, id: UUID) -> List[EmployeeTask]:
         query = select(EmployeeTask).where(EmployeeTask.assigned_to_id==id)
         result = self.db_session.execute(query).scalars().all()
-        return result
+        if self.archive is None:
+            return result
+        archived = self.db_session.execute(select(ArchivedTask).where(ArchivedTask.assigned_to_id == id)).scalars().all()
+        return list(result) + [self.archive.get_task(row.segment, row.aggregate_id) for row in archived]
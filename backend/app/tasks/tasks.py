@@ -1,17 +1,31 @@
+import asyncio
+import json
 from typing import List, Any
 from uuid import UUID
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select, insert, func
 from typing import List
-from app.tasks.tasks_service import ApproveTaskCommand, AssignTaskCommand, CancelTaskCommand, Command, RejectTaskCommand, SubmitTaskCommand, TaskEventDomain
-from app.tasks.task_models import TaskCompletedEvent
+from app.tasks.tasks_service import ApproveTaskCommand, AssignTaskCommand, BatchCommand, BatchRejectCommand, BulkAssignTaskCommand, CancelTaskCommand, Command, RejectTaskCommand, SubmitTaskCommand, TaskEventDomain
 from sqlmodel import func, select
-from app.api.deps import CurrentUser, SessionDep, TaskServiceDep, LevelsServiceDep
-from app.models import AvailableTask, AvailableTaskPublic, AvailableTasksPublic, Department, EmployeeTask, TaskEvent
+from app.api.deps import CurrentUser, SessionDep, TaskServiceDep, get_current_active_superuser
+from app.tasks.task_repository import ConcurrencyError
+from app.tasks.tasks_service import TaskService
+from app.core.config import settings
+from app.core.notifications import listener
+from app.models import TASK_EVENT_CHANNEL, AvailableTask, AvailableTaskPublic, AvailableTasksPublic, Department, EmployeeTask, TaskEvent, TaskEventFeed
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
 
+def run_command(taskService: TaskService, command: Command) -> Any:
+    try:
+        return taskService.handle_command(command)
+    except ConcurrencyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
 @router.get("/", response_model=AvailableTasksPublic)
 def read_tasks(
     session: SessionDep, current_user: CurrentUser, skip: int = 0, limit: int = 100, only_active: bool = True
@@ -82,17 +96,38 @@ def assign_task(
     task_id = taskService.create_task(task_in)
     return task_id
 
+@router.post(
+    "/assign-task/bulk",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_class=StreamingResponse,
+)
+def assign_task_bulk(
+     task_in: BulkAssignTaskCommand, taskService: TaskServiceDep
+) -> Any:
+    """
+    Assign one available task to many employees, streams the created task ids as NDJSON.
+    """
+    selectors = [task_in.assigned_to_ids, task_in.department_id, task_in.company_id]
+    if sum(selector is not None for selector in selectors) != 1:
+        raise HTTPException(
+            status_code=400,
+            detail="Provide exactly one of assigned_to_ids, department_id or company_id",
+        )
+    try:
+        task_ids = taskService.assign_tasks(task_in)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return StreamingResponse(
+        (json.dumps(str(task_id)) + "\n" for task_id in task_ids),
+        media_type="application/x-ndjson",
+    )
+
 @router.patch("/submit-task", response_model=TaskEventDomain)
-def submit_task(taskSerivce: TaskServiceDep, 
-                levelService: LevelsServiceDep,
-                taskSubmitCommand: SubmitTaskCommand) -> Any:
+def submit_task(taskSerivce: TaskServiceDep, taskSubmitCommand: SubmitTaskCommand) -> Any:
     """
     Submit task.
     """
-    tasks = taskSerivce.handle_command(taskSubmitCommand)
-    print(tasks)
-    if type(tasks) is TaskCompletedEvent:
-        levelService.task_completed(tasks.task_id, tasks.assigned_to_id)
+    tasks = run_command(taskSerivce, taskSubmitCommand)
     return tasks
 
 @router.patch("/approve-task", response_model=TaskEventDomain)
@@ -100,23 +135,47 @@ def approve_task(taskSerivce: TaskServiceDep, current_user: CurrentUser, taskCom
     """
     Approve task.
     """
-    tasks = taskSerivce.handle_command(ApproveTaskCommand(taskCommand.aggregate_id, current_user.id))
+    tasks = run_command(taskSerivce, ApproveTaskCommand(taskCommand.aggregate_id, current_user.id))
     return tasks
 
+@router.patch("/approve-task/batch", response_model=List[TaskEventDomain])
+def approve_tasks(taskSerivce: TaskServiceDep, current_user: CurrentUser, taskCommand: BatchCommand) -> Any:
+    """
+    Approve many tasks at once, tasks that can't be approved are skipped.
+    """
+    commands = [ApproveTaskCommand(aggregate_id, current_user.id) for aggregate_id in taskCommand.aggregate_ids]
+    try:
+        return taskSerivce.handle_commands(commands)
+    except ConcurrencyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
 @router.patch("/reject-task", response_model=TaskEventDomain)
 def reject_task(taskSerivce: TaskServiceDep, taskCommand: RejectTaskCommand) -> Any:
     """
     Reject task.
     """
-    tasks = taskSerivce.handle_command(taskCommand)
+    tasks = run_command(taskSerivce, taskCommand)
     return tasks
 
+@router.patch("/reject-task/batch", response_model=List[TaskEventDomain])
+def reject_tasks(taskSerivce: TaskServiceDep, current_user: CurrentUser, taskCommand: BatchRejectCommand) -> Any:
+    """
+    Reject many tasks at once, tasks that can't be rejected are skipped.
+    """
+    commands = [
+        RejectTaskCommand(aggregate_id, taskCommand.reason, current_user.id) for aggregate_id in taskCommand.aggregate_ids
+    ]
+    try:
+        return taskSerivce.handle_commands(commands)
+    except ConcurrencyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
 @router.patch("/cancel-task", response_model=TaskEventDomain)
 def cancel_task(taskSerivce: TaskServiceDep, taskCommand: CancelTaskCommand) -> Any:
     """
     Cancel task.
     """
-    tasks = taskSerivce.handle_command(taskCommand)
+    tasks = run_command(taskSerivce, taskCommand)
     return tasks
 
 @router.get("/employee-tasks/{id}", response_model=List[EmployeeTask])
@@ -127,6 +186,39 @@ def get_employee_tasks(taskService: TaskServiceDep, id: UUID) -> Any:
     tasks = taskService.get_employee_task(id)
     return tasks
 
+@router.get("/aggregates/{id}", response_model=EmployeeTask)
+def get_task_aggregate(taskService: TaskServiceDep, id: UUID) -> Any:
+    """
+    Get a task rebuilt from its latest snapshot and event stream.
+    """
+    task = taskService.get_aggregate_state(id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
+
+@router.get("/events/feed", response_model=TaskEventFeed)
+async def get_tasks_event_feed(
+    taskService: TaskServiceDep,
+    after: int = 0,
+    limit: int = Query(default=100, ge=1, le=1000),
+    wait: float = Query(default=0, ge=0, le=30),
+) -> Any:
+    """
+    Get events of every task in store order, starting after the given cursor.
+    With wait, hold the request up to that many seconds until new events arrive.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    while True:
+        position = listener.position(TASK_EVENT_CHANNEL) if wait else 0
+        events = await run_in_threadpool(taskService.get_event_feed, after, limit)
+        remaining = deadline - loop.time()
+        if events or remaining <= 0:
+            break
+        # Events held back behind an older transaction send no notification of their own
+        await listener.wait(TASK_EVENT_CHANNEL, position, min(remaining, settings.TASK_EVENT_FEED_RECHECK))
+    return TaskEventFeed(data=events, next_cursor=events[-1].sequence if events else after)
+
 @router.get("/events/{id}", response_model=list[TaskEvent])
 def get_tasks_event(taskService: TaskServiceDep, id: UUID) -> Any:
     """
@@ -1,12 +1,15 @@
 from datetime import datetime
 from typing import List, Optional
-from uuid import UUID, uuid4
+from uuid import UUID
 from dataclasses import asdict
 from functools import singledispatch
 from typing import Optional, List
-from app.tasks.task_repository import TaskRepository
+from app.core.config import settings
+from app.core.ids import new_id
+from fastapi.encoders import jsonable_encoder
+from app.tasks.unit_of_work import UnitOfWork
 from app.models import EmployeeTask, TaskEvent, TaskStatus
-from app.tasks.task_models import ApproveTaskCommand, AssignTaskCommand, CancelTaskCommand, Command, EmployeeTaskDomain, RejectTaskCommand, SubmitTaskCommand, TaskAssignedEvent, TaskCancelledEvent, TaskCompletedEvent, TaskEventDomain, TaskRejectedEvent, TaskSubmittedEvent
+from app.tasks.task_models import ApproveTaskCommand, AssignTaskCommand, BatchCommand, BatchRejectCommand, BulkAssignTaskCommand, CancelTaskCommand, Command, EmployeeTaskDomain, RejectTaskCommand, SubmitTaskCommand, TaskAssignedEvent, TaskCancelledEvent, TaskCompletedEvent, TaskEventDomain, TaskRejectedEvent, TaskSubmittedEvent
 
 #region Event Handler
 
@@ -17,16 +20,21 @@ def apply_event(event: TaskEventDomain, task: EmployeeTask | None) -> EmployeeTa
 
 @apply_event.register
 def _(event: TaskAssignedEvent, task: EmployeeTask | None) -> EmployeeTask:
+    # First event of a stream, the task is built from the event alone
     return EmployeeTask(
-        id=task.id,
-        title=task.title,
+        id=event.aggregate_id,
+        title=event.title,
+        description=event.description,
         version=event.version,
         task_id=event.task_id,
         assigned_to_id=event.assigned_to_id,
         status=TaskStatus.ASSIGNED,
         created_at=event.timestamp,
-        requires_approval=task.requires_approval,
-        reason=task.reason
+        requires_approval=event.requires_approval,
+        reason="",
+        completed_at=None,
+        submitted_at=None,
+        approved_by_id=None
     )
 
 @apply_event.register
@@ -35,12 +43,13 @@ def _(event: TaskCompletedEvent, task: EmployeeTask | None) -> EmployeeTask:
         id=task.id,
         title=task.title,
         description=task.description,
-        version=task.version,
+        version=event.version,
         task_id=event.task_id,
         assigned_to_id=task.assigned_to_id,
         status=TaskStatus.COMPLETED,
         created_at=task.created_at,
-        completed_at=datetime.now(),
+        requires_approval=task.requires_approval,
+        completed_at=event.timestamp,
         approved_by_id=event.approved_by_id,
         submitted_at=task.submitted_at,
         reason=task.reason
@@ -52,12 +61,13 @@ def _(event: TaskCancelledEvent, task: EmployeeTask | None) -> EmployeeTask:
         id=task.id,
         title=task.title,
         description=task.description,
-        version=task.version,
+        version=event.version,
         task_id=task.task_id,
         assigned_to_id=task.assigned_to_id,
         status=TaskStatus.CANCELED,
         created_at=task.created_at,
-        completed_at=datetime.now(),
+        requires_approval=task.requires_approval,
+        completed_at=event.timestamp,
         reason=event.reason
     )
 
@@ -67,13 +77,14 @@ def _(event: TaskSubmittedEvent, task: EmployeeTask | None) -> EmployeeTask:
         id=task.id,
         title=task.title,
         description=task.description,
-        version=task.version,
+        version=event.version,
         task_id=task.task_id,
         assigned_to_id=task.assigned_to_id,
         status=TaskStatus.WAITING_APPROVAL,
         created_at=task.created_at,
+        requires_approval=task.requires_approval,
         completed_at=task.created_at,
-        submitted_at=datetime.now(),
+        submitted_at=event.timestamp,
         reason=task.reason
     )
 
@@ -83,12 +94,13 @@ def _(event: TaskRejectedEvent, task: EmployeeTask | None) -> EmployeeTask:
         id=task.id,
         title=task.title,
         description=task.description,
-        version=task.version,
+        version=event.version,
         task_id=task.task_id,
         assigned_to_id=task.assigned_to_id,
         status=TaskStatus.REJECTED,
         created_at=task.created_at,
-        completed_at=datetime.now(),
+        requires_approval=task.requires_approval,
+        completed_at=event.timestamp,
         reason=event.reason
     )
 #endregion
@@ -101,7 +113,7 @@ def handle_command(command: Command, task: EmployeeTask | None) -> Optional[Task
 #This should be handled by def create in employee_task
 @handle_command.register
 def _(command: AssignTaskCommand, task: EmployeeTask | None) -> TaskAssignedEvent:
-    id = uuid4()
+    id = new_id()
     return TaskAssignedEvent(
             aggregate_id=id,
             task_id = command.task_id,
@@ -117,13 +129,13 @@ def _(command: SubmitTaskCommand, task: EmployeeTask | None) -> TaskCompletedEve
             return TaskSubmittedEvent(
             aggregate_id=task.id,
             timestamp=datetime.now(),
-            version=task.version
+            version=task.version + 1
             )
         
         return TaskCompletedEvent(
             aggregate_id=task.id,
             timestamp=datetime.now(),
-            version=task.version,
+            version=task.version + 1,
             assigned_to_id=task.assigned_to_id,
             task_id=task.task_id,
             approved_by_id=task.assigned_to_id
@@ -136,7 +148,7 @@ def _(command: ApproveTaskCommand, task: EmployeeTask | None) -> TaskCompletedEv
         return TaskCompletedEvent(
             aggregate_id=task.id,
             timestamp=datetime.now(),
-            version=task.version,
+            version=task.version + 1,
             assigned_to_id=task.assigned_to_id,
             task_id=task.task_id,
             approved_by_id=command.approved_by_id
@@ -149,7 +161,7 @@ def _(command: RejectTaskCommand, task: EmployeeTask | None) -> TaskRejectedEven
         return TaskRejectedEvent(
             aggregate_id=task.id,
             timestamp=datetime.now(),
-            version=task.version,
+            version=task.version + 1,
             reason=command.reason,
             approved_by_id=command.approved_by_id
         )
@@ -160,14 +172,28 @@ def _(command: CancelTaskCommand, task: EmployeeTask) -> TaskCancelledEvent:
     return TaskCancelledEvent(
         aggregate_id=task.id,
         timestamp=datetime.now(),
-        version=task.version,
+        version=task.version + 1,
         reason=command.reason
     )
 #endregion
 
+# Events whose side effects run from the outbox, see app/outbox/handlers.py
+outbox_events = (TaskCompletedEvent,)
+
 class TaskService:
-    def __init__(self, repository: TaskRepository):
-        self.repository = repository
+    def __init__(self, uow: UnitOfWork):
+        self.uow = uow
+        self.repository = uow.tasks
+
+    def _snapshot_if_due(self, task: EmployeeTask) -> None:
+        snapshot_every = settings.TASK_SNAPSHOT_EVERY
+        if snapshot_every and task.version % snapshot_every == 0:
+            self.repository.save_snapshot(task)
+
+    def _publish(self, events: List[TaskEventDomain]) -> None:
+        for event in events:
+            if isinstance(event, outbox_events):
+                self.uow.outbox.add(type(event).__name__, jsonable_encoder(event))
 
     def get_employee_task(self, id: UUID) -> List[EmployeeTask]:
         return self.repository.get_user_tasks(id)
@@ -175,34 +201,100 @@ class TaskService:
     def get_aggregates(self, id: UUID) -> List[TaskEvent]:
         return self.repository.get_events(id)
 
+    def get_event_feed(self, after: int, limit: int) -> List[TaskEvent]:
+        events = self.repository.get_event_feed(after, limit)
+        # Long polls call this repeatedly, don't hold a connection in between
+        self.uow.close()
+        return events
+
+    def get_aggregate_state(self, id: UUID) -> Optional[EmployeeTask]:
+        # Imported here, task_rehydration depends on the event handlers of this module
+        from app.tasks.task_rehydration import TaskRehydrator
+        return TaskRehydrator(self.repository).load(id)
+
     def create_task(self, command: AssignTaskCommand) -> UUID:
         task, event = EmployeeTaskDomain.create(command)
-        self.repository.save(EmployeeTask(**asdict(task)))
-        self.repository.save_event(event)
+        with self.uow:
+            self.repository.save(EmployeeTask(**asdict(task)))
+            self.repository.save_event(event)
+            self.uow.commit()
         return task.id
 
+    def assign_tasks(self, command: BulkAssignTaskCommand) -> List[UUID]:
+        with self.uow:
+            available_task = self.repository.get_available_task(command.task_id)
+            if available_task is None:
+                raise ValueError(f"Available task {command.task_id} not found")
+
+            if command.company_id and command.company_id != available_task.company_id:
+                raise ValueError(f"Available task {command.task_id} not found in company {command.company_id}")
+            # Assignees are always limited to the company owning the task
+            assignee_ids = self.repository.get_assignee_ids(
+                available_task.company_id, assigned_to_ids=command.assigned_to_ids, department_id=command.department_id
+            )
+
+            tasks, events = [], []
+            for assigned_to_id in assignee_ids:
+                task, event = EmployeeTaskDomain.create(AssignTaskCommand(
+                    assigned_to_id=assigned_to_id,
+                    task_id=available_task.id,
+                    title=available_task.title,
+                    description=available_task.description,
+                    requires_approval=available_task.requires_approval,
+                ))
+                tasks.append(EmployeeTask(**asdict(task)))
+                events.append(event)
+
+            self.repository.save_many(tasks, events)
+            self.uow.commit()
+        return [task.id for task in tasks]
+
     def handle_command(self, command: Command) -> TaskEvent:
-        # Retrieve the task by ID
-        task = self.repository.get_by_id(command.aggregate_id)
-        
-        # If the task doesn't exist, raise an error
-        if task is None:
-            raise ValueError(f"Task {command.aggregate_id} not found")
-
-        # Generate the appropriate event using the command handler
-        event = handle_command(command, task)
-        # If no event is generated (e.g., task already completed), do nothing
-        if event is None:
-            return
-
-        # Apply the event to update the task's state
-        updated_task = apply_event(event, task)
-
-        # Save the updated task and the event to the repository
-        self.repository.save(updated_task)
-        print('saved task:')
-        print(updated_task)
-        self.repository.save_event(event)
-        print('saved event:')
-        print(event)
+        with self.uow:
+            # Retrieve the task by ID
+            task = self.repository.get_by_id(command.aggregate_id)
+
+            # If the task doesn't exist, raise an error
+            if task is None:
+                raise ValueError(f"Task {command.aggregate_id} not found")
+
+            # Generate the appropriate event using the command handler
+            event = handle_command(command, task)
+            # If no event is generated (e.g., task already completed), do nothing
+            if event is None:
+                return
+
+            # Apply the event to update the task's state
+            updated_task = apply_event(event, task)
+
+            # Stage the updated task, the event and its outbox message,
+            # then write all of them in one transaction
+            self.repository.append(updated_task, event, expected_version=task.version)
+            self._snapshot_if_due(updated_task)
+            self._publish([event])
+            self.uow.commit()
         return event
+
+    def handle_commands(self, commands: List[Command]) -> List[TaskEventDomain]:
+        with self.uow:
+            # Load every task in one query, ids that don't exist are skipped
+            tasks = {task.id: task for task in self.repository.get_by_ids([command.aggregate_id for command in commands])}
+
+            changes = []
+            for command in commands:
+                task = tasks.pop(command.aggregate_id, None)
+                if task is None:
+                    continue
+                event = handle_command(command, task)
+                if event is None:
+                    continue
+                changes.append((apply_event(event, task), event, task.version))
+
+            # All task updates, events and outbox messages go out in one transaction
+            self.repository.append_many(changes)
+            for updated_task, _, _ in changes:
+                self._snapshot_if_due(updated_task)
+            events = [event for _, event, _ in changes]
+            self._publish(events)
+            self.uow.commit()
+        return events
@@ -0,0 +1,51 @@
+from sqlmodel import Session
+
+from app.levels.levels_repository import LevelsRepository, PostgresLevelsRepository
+from app.outbox.outbox_repository import OutboxRepository, PostgresOutboxRepository
+from app.tasks.task_archive import get_task_archive
+from app.tasks.task_repository import PostgresTaskRepository, TaskRepository
+
+
+class UnitOfWork:
+    """
+    Groups the repositories touched by a task command so that everything they
+    write lands in a single transaction. Repositories never commit on their own,
+    callers commit the unit of work once all changes are staged.
+    """
+    tasks: TaskRepository
+    levels: LevelsRepository
+    outbox: OutboxRepository
+
+    def __enter__(self) -> "UnitOfWork":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is not None:
+            self.rollback()
+
+    def commit(self) -> None:
+        raise NotImplementedError
+
+    def rollback(self) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        # Gives the connection back between reads, loaded objects stay usable
+        raise NotImplementedError
+
+
+class PostgresUnitOfWork(UnitOfWork):
+    def __init__(self, db_session: Session):
+        self.db_session = db_session
+        self.tasks = PostgresTaskRepository(db_session, archive=get_task_archive())
+        self.levels = PostgresLevelsRepository(db_session)
+        self.outbox = PostgresOutboxRepository(db_session)
+
+    def commit(self) -> None:
+        self.db_session.commit()
+
+    def rollback(self) -> None:
+        self.db_session.rollback()
+
+    def close(self) -> None:
+        self.db_session.close()
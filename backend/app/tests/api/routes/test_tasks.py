@@ -0,0 +1,150 @@
+import json
+import threading
+import time
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, func, select
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models import EmployeeLevel, EmployeeTask, TaskEvent, TaskStatus
+from app.tasks.task_models import CancelTaskCommand, SubmitTaskCommand
+from app.tasks.tasks_service import TaskService
+from app.tasks.unit_of_work import PostgresUnitOfWork
+from app.tests.utils.outbox import drain_outbox
+from app.tests.utils.task import (
+    assign_command,
+    create_random_available_task,
+    create_random_employee,
+)
+
+
+def test_assign_task_bulk_to_department(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    task = create_random_available_task(db)
+    employees = [create_random_employee(db, task) for _ in range(3)]
+    response = client.post(
+        f"{settings.API_V1_STR}/tasks/assign-task/bulk",
+        headers=superuser_token_headers,
+        json={"task_id": str(task.id), "department_id": str(task.department_id)},
+    )
+    assert response.status_code == 200
+    task_ids = [uuid.UUID(json.loads(line)) for line in response.text.splitlines()]
+    assert len(task_ids) == 3
+    assigned = db.exec(select(EmployeeTask).where(EmployeeTask.id.in_(task_ids))).all()
+    assert {row.assigned_to_id for row in assigned} == {employee.id for employee in employees}
+    assert all(row.title == task.title for row in assigned)
+    events = db.exec(select(TaskEvent).where(TaskEvent.aggregate_id.in_(task_ids))).all()
+    assert {(event.event_type, event.version) for event in events} == {("TaskAssignedEvent", 1)}
+
+
+def test_assign_task_bulk_skips_employees_of_other_companies(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    task = create_random_available_task(db)
+    employee = create_random_employee(db, task)
+    outsider = create_random_employee(db, create_random_available_task(db))
+    response = client.post(
+        f"{settings.API_V1_STR}/tasks/assign-task/bulk",
+        headers=superuser_token_headers,
+        json={"task_id": str(task.id), "assigned_to_ids": [str(employee.id), str(outsider.id)]},
+    )
+    assert response.status_code == 200
+    task_ids = [uuid.UUID(json.loads(line)) for line in response.text.splitlines()]
+    assert len(task_ids) == 1
+    assert db.get(EmployeeTask, task_ids[0]).assigned_to_id == employee.id
+
+
+def test_assign_task_bulk_requires_one_selector(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    task = create_random_available_task(db)
+    response = client.post(
+        f"{settings.API_V1_STR}/tasks/assign-task/bulk",
+        headers=superuser_token_headers,
+        json={"task_id": str(task.id), "department_id": str(task.department_id), "company_id": str(task.company_id)},
+    )
+    assert response.status_code == 400
+
+
+def submitted_tasks(db: Session, count: int) -> tuple[list[uuid.UUID], list[uuid.UUID]]:
+    task = create_random_available_task(db, requires_approval=True, person_xp=10)
+    employees = [create_random_employee(db, task) for _ in range(count)]
+    service = TaskService(PostgresUnitOfWork(db))
+    aggregate_ids = [service.create_task(assign_command(task, employee)) for employee in employees]
+    for aggregate_id in aggregate_ids:
+        service.handle_command(SubmitTaskCommand(aggregate_id=aggregate_id))
+    return aggregate_ids, [employee.id for employee in employees]
+
+
+def test_approve_tasks_batch(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    aggregate_ids, employee_ids = submitted_tasks(db, 3)
+    response = client.patch(
+        f"{settings.API_V1_STR}/tasks/approve-task/batch",
+        headers=superuser_token_headers,
+        json={"aggregate_ids": [str(aggregate_id) for aggregate_id in aggregate_ids + [uuid.uuid4()]]},
+    )
+    assert response.status_code == 200
+    assert {event["aggregate_id"] for event in response.json()} == {str(aggregate_id) for aggregate_id in aggregate_ids}
+    db.expire_all()
+    assert {db.get(EmployeeTask, aggregate_id).status for aggregate_id in aggregate_ids} == {TaskStatus.COMPLETED}
+    drain_outbox(db)
+    db.expire_all()
+    levels = db.exec(select(EmployeeLevel).where(EmployeeLevel.employee_id.in_(employee_ids))).all()
+    assert [level.xp for level in levels] == [10, 10, 10]
+
+
+def test_reject_tasks_batch_skips_tasks_not_waiting_approval(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    aggregate_ids, _ = submitted_tasks(db, 2)
+    TaskService(PostgresUnitOfWork(db)).handle_command(CancelTaskCommand(aggregate_id=aggregate_ids[0], reason="gone"))
+    response = client.patch(
+        f"{settings.API_V1_STR}/tasks/reject-task/batch",
+        headers=superuser_token_headers,
+        json={"aggregate_ids": [str(aggregate_id) for aggregate_id in aggregate_ids], "reason": "redo"},
+    )
+    assert response.status_code == 200
+    assert [event["aggregate_id"] for event in response.json()] == [str(aggregate_ids[1])]
+    db.expire_all()
+    assert db.get(EmployeeTask, aggregate_ids[1]).status == TaskStatus.REJECTED
+
+
+def latest_sequence(db: Session) -> int:
+    return db.exec(select(func.coalesce(func.max(TaskEvent.sequence), 0))).one()
+
+
+def test_event_feed_pages_by_sequence(
+    client: TestClient, db: Session
+) -> None:
+    after = latest_sequence(db)
+    aggregate_ids, _ = submitted_tasks(db, 2)
+
+    first = client.get(f"{settings.API_V1_STR}/tasks/events/feed", params={"after": after, "limit": 3}).json()
+    second = client.get(f"{settings.API_V1_STR}/tasks/events/feed", params={"after": first["next_cursor"]}).json()
+
+    events = first["data"] + second["data"]
+    assert len(first["data"]) == 3
+    assert [event["sequence"] for event in events] == sorted(event["sequence"] for event in events)
+    assert {event["aggregate_id"] for event in events} == {str(aggregate_id) for aggregate_id in aggregate_ids}
+    assert second["next_cursor"] == events[-1]["sequence"]
+
+
+def test_event_feed_long_poll_returns_when_events_arrive(
+    client: TestClient, db: Session
+) -> None:
+    after = latest_sequence(db)
+    timer = threading.Timer(0.5, submitted_tasks, args=(Session(engine), 1))
+    timer.start()
+
+    started = time.monotonic()
+    response = client.get(f"{settings.API_V1_STR}/tasks/events/feed", params={"after": after, "wait": 10})
+    timer.join()
+
+    assert response.status_code == 200
+    assert response.json()["data"]
+    assert time.monotonic() - started < 5
@@ -0,0 +1,29 @@
+from uuid import UUID
+
+from app.core import ids
+from app.core.config import settings
+
+
+def test_uuid7_layout() -> None:
+    before_ms = ids.time.time_ns() // 1_000_000
+    value = ids.uuid7()
+
+    assert value.version == 7
+    assert value.variant == "specified in RFC 4122"
+    assert value.int >> 80 >= before_ms
+
+
+def test_uuid7_is_strictly_increasing_within_a_millisecond() -> None:
+    values = [ids.uuid7() for _ in range(10_000)]
+
+    assert values == sorted(values)
+    assert len(set(values)) == len(values)
+
+
+def test_new_id_follows_setting(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "TIME_ORDERED_IDS", True)
+    assert ids.new_id().version == 7
+
+    monkeypatch.setattr(settings, "TIME_ORDERED_IDS", False)
+    assert isinstance(ids.new_id(), UUID)
+    assert ids.new_id().version == 4
@@ -0,0 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlmodel import Session, select
+
+from app.core.db import engine
+from app.levels.levels_repository import PostgresLevelsRepository
+from app.levels.levels_service import LevelsService
+from app.models import EmployeeLevel, EmployeeSkill
+from app.tests.utils.task import create_random_available_task, create_random_employee
+
+
+def test_task_completed_grants_person_and_skill_xp(db: Session) -> None:
+    task = create_random_available_task(db, person_xp=100, skill_xp=50)
+    employee = create_random_employee(db, task)
+
+    LevelsService(PostgresLevelsRepository(db)).task_completed(task.id, employee.id)
+    LevelsService(PostgresLevelsRepository(db)).task_completed(task.id, employee.id)
+    db.commit()
+
+    level = db.exec(select(EmployeeLevel).where(EmployeeLevel.employee_id == employee.id)).one()
+    assert (level.level, level.xp) == (0, 200)
+    skill = db.exec(select(EmployeeSkill).where(EmployeeSkill.user_id == employee.id)).one()
+    assert (skill.skill_id, skill.level, skill.xp) == (task.skill_id, 0, 100)
+
+
+def test_task_completed_levels_up(db: Session) -> None:
+    task = create_random_available_task(db, person_xp=600, skill_xp=600)
+    employee = create_random_employee(db, task)
+
+    granted = LevelsService(PostgresLevelsRepository(db)).task_completed(task.id, employee.id)
+    db.commit()
+
+    assert sorted((g.skill_id is None, g.level, g.xp) for g in granted) == [(False, 1, 0), (True, 1, 0)]
+
+
+def test_concurrent_completions_do_not_lose_xp(db: Session) -> None:
+    task = create_random_available_task(db, person_xp=1, skill_xp=1)
+    employee = create_random_employee(db, task)
+
+    def complete(_: int) -> None:
+        with Session(engine) as session:
+            LevelsService(PostgresLevelsRepository(session)).task_completed(task.id, employee.id)
+            session.commit()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(complete, range(40)))
+
+    level = db.exec(select(EmployeeLevel).where(EmployeeLevel.employee_id == employee.id)).one()
+    db.refresh(level)
+    assert level.xp == 40
+    skill = db.exec(select(EmployeeSkill).where(EmployeeSkill.user_id == employee.id)).one()
+    db.refresh(skill)
+    assert skill.xp == 40
@@ -0,0 +1,67 @@
+from sqlmodel import Session, select
+
+from app.core.db import engine
+from app.models import EmployeeLevel, OutboxMessage
+from app.outbox.dispatcher import OutboxDispatcher
+from app.outbox.handlers import outbox_handlers
+from app.tasks.task_models import SubmitTaskCommand
+from app.tasks.tasks_service import TaskService
+from app.tasks.unit_of_work import PostgresUnitOfWork
+from app.tests.utils.outbox import drain_outbox
+from app.tests.utils.task import (
+    assign_command,
+    create_random_available_task,
+    create_random_employee,
+)
+
+
+def _completed_tasks(db: Session, count: int):
+    task = create_random_available_task(db, person_xp=10)
+    employees = [create_random_employee(db, task) for _ in range(count)]
+    service = TaskService(PostgresUnitOfWork(db))
+    for employee in employees:
+        aggregate_id = service.create_task(assign_command(task, employee))
+        service.handle_command(SubmitTaskCommand(aggregate_id=aggregate_id))
+    return employees
+
+
+def _messages_of(db: Session, employees) -> list[OutboxMessage]:
+    ids = [str(employee.id) for employee in employees]
+    db.expire_all()
+    return db.exec(select(OutboxMessage).where(OutboxMessage.payload["assigned_to_id"].as_string().in_(ids))).all()
+
+
+def test_dispatcher_hands_a_batch_to_handlers(db: Session) -> None:
+    drain_outbox(db)
+    employees = _completed_tasks(db, 3)
+    batches = []
+
+    dispatched = OutboxDispatcher(engine, handlers={"TaskCompletedEvent": [lambda session, payloads: batches.append(payloads)]}).dispatch_once()
+
+    assert dispatched == 3
+    assert [len(batch) for batch in batches] == [3]
+    assert all(message.processed_at is not None for message in _messages_of(db, employees))
+
+
+def test_failing_message_is_retried_without_blocking_the_batch(db: Session) -> None:
+    drain_outbox(db)
+    employees = _completed_tasks(db, 3)
+    poisoned = str(employees[0].id)
+
+    def grant_unless_poisoned(session, payloads):
+        if any(payload["assigned_to_id"] == poisoned for payload in payloads):
+            raise RuntimeError("handler failed")
+        outbox_handlers["TaskCompletedEvent"][0](session, payloads)
+
+    OutboxDispatcher(engine, handlers={"TaskCompletedEvent": [grant_unless_poisoned]}).dispatch_once()
+
+    messages = {message.payload["assigned_to_id"]: message for message in _messages_of(db, employees)}
+    assert messages[poisoned].processed_at is None
+    assert messages[poisoned].attempts == 1
+    assert "handler failed" in messages[poisoned].last_error
+    assert messages[poisoned].available_at > messages[poisoned].created_at
+    levels = {
+        level.employee_id: level.xp
+        for level in db.exec(select(EmployeeLevel).where(EmployeeLevel.employee_id.in_([employee.id for employee in employees])))
+    }
+    assert levels == {employees[0].id: 0, employees[1].id: 10, employees[2].id: 10}
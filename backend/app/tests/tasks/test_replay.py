@@ -0,0 +1,54 @@
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from app.models import EmployeeLevel, EmployeeSkill, EmployeeTask, TaskStatus
+from app.replay import replay_partition
+from app.tasks.task_models import SubmitTaskCommand
+from app.tasks.tasks_service import TaskService
+from app.tasks.unit_of_work import PostgresUnitOfWork
+from app.tests.utils.outbox import drain_outbox
+from app.tests.utils.task import (
+    assign_command,
+    create_random_available_task,
+    create_random_employee,
+)
+
+
+def _completed_task_with_lost_state(db: Session):
+    task = create_random_available_task(db, person_xp=100, skill_xp=50)
+    employee = create_random_employee(db, task)
+    service = TaskService(PostgresUnitOfWork(db))
+    aggregate_id = service.create_task(assign_command(task, employee))
+    service.handle_command(SubmitTaskCommand(aggregate_id=aggregate_id))
+    drain_outbox(db)
+
+    db.execute(update(EmployeeTask).where(EmployeeTask.id == aggregate_id).values(status=TaskStatus.ASSIGNED))
+    db.execute(update(EmployeeLevel).where(EmployeeLevel.employee_id == employee.id).values(xp=0))
+    db.execute(update(EmployeeSkill).where(EmployeeSkill.user_id == employee.id).values(xp=0))
+    db.commit()
+    db.expire_all()
+    return aggregate_id, employee
+
+
+def test_dry_run_reports_differences_without_writing(db: Session) -> None:
+    aggregate_id, employee = _completed_task_with_lost_state(db)
+
+    result = replay_partition(0, 1, dry_run=True, max_diffs=10_000)
+
+    assert any(diff.startswith(f"task {aggregate_id}") for diff in result.diffs)
+    assert any(diff.startswith(f"level {employee.id}") for diff in result.diffs)
+    assert db.get(EmployeeTask, aggregate_id).status == TaskStatus.ASSIGNED
+
+
+def test_replay_rebuilds_tasks_levels_and_skills(db: Session) -> None:
+    aggregate_id, employee = _completed_task_with_lost_state(db)
+
+    result = replay_partition(0, 1)
+
+    assert result.tasks_changed >= 1
+    db.expire_all()
+    assert db.get(EmployeeTask, aggregate_id).status == TaskStatus.COMPLETED
+    level = db.exec(select(EmployeeLevel).where(EmployeeLevel.employee_id == employee.id)).one()
+    assert level.xp == 100
+    skill = db.exec(select(EmployeeSkill).where(EmployeeSkill.user_id == employee.id)).one()
+    assert skill.xp == 50
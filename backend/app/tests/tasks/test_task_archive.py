@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from app.models import ArchivedTask, EmployeeTask, TaskEvent, TaskStatus
+from app.tasks.task_archive import TaskArchive, TaskArchiver
+from app.tasks.task_models import SubmitTaskCommand
+from app.tasks.task_repository import PostgresTaskRepository
+from app.tasks.task_rehydration import TaskRehydrator
+from app.tasks.tasks_service import TaskService
+from app.tasks.unit_of_work import PostgresUnitOfWork
+from app.tests.utils.task import (
+    assign_command,
+    create_random_available_task,
+    create_random_employee,
+)
+
+
+def test_finished_tasks_move_to_the_archive_and_stay_readable(db: Session, tmp_path) -> None:
+    task = create_random_available_task(db)
+    employee = create_random_employee(db, task)
+    service = TaskService(PostgresUnitOfWork(db))
+    finished_id = service.create_task(assign_command(task, employee))
+    service.handle_command(SubmitTaskCommand(aggregate_id=finished_id))
+    open_id = service.create_task(assign_command(task, employee))
+    db.execute(
+        update(EmployeeTask)
+        .where(EmployeeTask.assigned_to_id == employee.id)
+        .values(created_at=datetime.now() - timedelta(days=400), completed_at=datetime.now() - timedelta(days=400))
+    )
+    db.commit()
+
+    archive = TaskArchive(tmp_path)
+    archived = TaskArchiver(db, archive).archive_batch(datetime.now() - timedelta(days=180))
+    db.commit()
+
+    assert archived >= 1
+    assert db.get(EmployeeTask, finished_id) is None
+    assert db.exec(select(TaskEvent).where(TaskEvent.aggregate_id == finished_id)).all() == []
+    assert db.get(ArchivedTask, finished_id).assigned_to_id == employee.id
+
+    repository = PostgresTaskRepository(db, archive=archive)
+    assert [event.version for event in repository.get_events(finished_id)] == [1, 2]
+    user_tasks = {task.id: task for task in repository.get_user_tasks(employee.id)}
+    assert set(user_tasks) == {finished_id, open_id}
+    assert user_tasks[finished_id].status == TaskStatus.COMPLETED
+    assert TaskRehydrator(repository).load(finished_id).status == TaskStatus.COMPLETED
+    archive.close()
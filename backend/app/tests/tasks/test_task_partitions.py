@@ -0,0 +1,60 @@
+from datetime import date, datetime
+from uuid import uuid4
+
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+from app.core.db import engine
+from app.models import TaskEvent
+from app.tasks.task_partitions import TaskEventPartitions
+
+
+def _event_at(timestamp: datetime) -> TaskEvent:
+    return TaskEvent(
+        aggregate_id=uuid4(), timestamp=timestamp, version=1, event_type="TaskAssignedEvent",
+        assigned_to_id=None, task_id=None, approved_by_id=None,
+    )
+
+
+def _partition_of(db: Session, event: TaskEvent) -> str:
+    return db.execute(text("SELECT tableoid::regclass::text FROM taskevent WHERE id = :id"), {"id": event.id}).scalar_one()
+
+
+def test_create_moves_events_out_of_the_default_partition(db: Session) -> None:
+    with Session(engine) as session:
+        event = _event_at(datetime(2001, 5, 3, 12))
+        session.add(event)
+        session.commit()
+        assert _partition_of(session, event) == "taskevent_default"
+
+        created = TaskEventPartitions(session).ensure(date(2001, 5, 17), 2)
+        session.commit()
+
+        assert created == ["taskevent_y2001m05", "taskevent_y2001m06"]
+        assert _partition_of(session, event) == "taskevent_y2001m05"
+        assert TaskEventPartitions(session).ensure(date(2001, 5, 1), 1) == []
+
+        session.delete(session.get(TaskEvent, (event.id, event.timestamp)))
+        session.commit()
+
+
+def test_detach_keeps_recent_partitions(db: Session) -> None:
+    with Session(engine) as session:
+        partitions = TaskEventPartitions(session)
+        partitions.ensure(date(2002, 1, 1), 3)
+        event = _event_at(datetime(2002, 1, 10))
+        event_id = event.id
+        session.add(event)
+        session.commit()
+
+        detached = partitions.detach(date(2002, 3, 1))
+        session.commit()
+
+        assert detached[-2:] == ["taskevent_y2002m01", "taskevent_y2002m02"]
+        assert "taskevent_y2002m03" in [partition.name for partition in partitions.list()]
+        assert session.exec(select(TaskEvent.id).where(TaskEvent.id == event_id)).first() is None
+        # Detached partitions are ordinary tables ready to be archived
+        assert session.execute(text("SELECT count(*) FROM taskevent_y2002m01")).scalar_one() == 1
+        for name in detached:
+            session.execute(text(f"DROP TABLE {name}"))
+        session.commit()
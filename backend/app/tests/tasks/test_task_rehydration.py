@@ -0,0 +1,52 @@
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models import EmployeeTask, TaskSnapshot, TaskStatus
+from app.tasks.task_models import CancelTaskCommand, RejectTaskCommand, SubmitTaskCommand
+from app.tasks.task_rehydration import TaskRehydrator
+from app.tasks.tasks_service import TaskService
+from app.tasks.unit_of_work import PostgresUnitOfWork
+from app.tests.utils.task import (
+    assign_command,
+    create_random_available_task,
+    create_random_employee,
+)
+
+
+def test_rehydrated_task_matches_stored_row(db: Session) -> None:
+    task = create_random_available_task(db, requires_approval=True)
+    employee = create_random_employee(db, task)
+    service = TaskService(PostgresUnitOfWork(db))
+    aggregate_id = service.create_task(assign_command(task, employee))
+    service.handle_command(SubmitTaskCommand(aggregate_id=aggregate_id))
+
+    rehydrated = service.get_aggregate_state(aggregate_id)
+
+    stored = db.get(EmployeeTask, aggregate_id)
+    db.refresh(stored)
+    assert rehydrated.version == stored.version == 2
+    assert rehydrated.status == stored.status == TaskStatus.WAITING_APPROVAL
+    assert rehydrated.title == stored.title
+    assert rehydrated.requires_approval is True
+    assert rehydrated.submitted_at == stored.submitted_at
+
+
+def test_snapshot_is_written_every_configured_version(db: Session, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "TASK_SNAPSHOT_EVERY", 3)
+    task = create_random_available_task(db, requires_approval=True)
+    employee = create_random_employee(db, task)
+    uow = PostgresUnitOfWork(db)
+    service = TaskService(uow)
+    aggregate_id = service.create_task(assign_command(task, employee))
+
+    service.handle_command(SubmitTaskCommand(aggregate_id=aggregate_id))
+    service.handle_command(RejectTaskCommand(aggregate_id=aggregate_id, reason="again", approved_by_id=employee.id))
+    service.handle_command(CancelTaskCommand(aggregate_id=aggregate_id, reason="dropped"))
+
+    snapshot = db.exec(select(TaskSnapshot).where(TaskSnapshot.aggregate_id == aggregate_id)).one()
+    assert snapshot.version == 3
+    rehydrated = TaskRehydrator(uow.tasks).load(aggregate_id)
+    assert rehydrated.version == 4
+    assert rehydrated.status == TaskStatus.CANCELED
+    assert rehydrated.reason == "dropped"
+    assert rehydrated.requires_approval is True
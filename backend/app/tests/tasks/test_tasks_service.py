@@ -0,0 +1,119 @@
+import pytest
+from sqlmodel import Session, func, select
+
+from app.core.db import engine
+from app.models import EmployeeLevel, EmployeeTask, OutboxMessage, TaskEvent, TaskStatus
+from app.tasks.task_models import (
+    ApproveTaskCommand,
+    CancelTaskCommand,
+    EmployeeTaskDomain,
+    SubmitTaskCommand,
+    TaskCompletedEvent,
+)
+from app.outbox.outbox_repository import PostgresOutboxRepository
+from app.tasks.task_repository import ConcurrencyError
+from app.tasks.tasks_service import TaskService, apply_event, handle_command
+from app.tasks.unit_of_work import PostgresUnitOfWork
+from app.tests.utils.outbox import drain_outbox
+from app.tests.utils.task import (
+    assign_command,
+    create_random_available_task,
+    create_random_employee,
+)
+
+
+class FailingOutboxRepository(PostgresOutboxRepository):
+    def add(self, topic, payload):
+        raise RuntimeError("outbox unavailable")
+
+
+def test_submit_task_writes_task_event_and_outbox_message(db: Session) -> None:
+    task = create_random_available_task(db, person_xp=100)
+    employee = create_random_employee(db, task)
+    service = TaskService(PostgresUnitOfWork(db))
+    aggregate_id = service.create_task(assign_command(task, employee))
+
+    event = service.handle_command(SubmitTaskCommand(aggregate_id=aggregate_id))
+
+    assert isinstance(event, TaskCompletedEvent)
+    employee_task = db.get(EmployeeTask, aggregate_id)
+    db.refresh(employee_task)
+    assert employee_task.status == TaskStatus.COMPLETED
+    events = db.exec(select(TaskEvent).where(TaskEvent.aggregate_id == aggregate_id)).all()
+    assert len(events) == 2
+    messages = db.exec(select(OutboxMessage).where(OutboxMessage.payload["aggregate_id"].as_string() == str(aggregate_id))).all()
+    assert [message.topic for message in messages] == ["TaskCompletedEvent"]
+
+    drain_outbox(db)
+
+    level = db.exec(select(EmployeeLevel).where(EmployeeLevel.employee_id == employee.id)).one()
+    db.refresh(level)
+    assert level.xp == 100
+
+
+def test_submit_task_is_rolled_back_when_outbox_write_fails(db: Session) -> None:
+    task = create_random_available_task(db)
+    employee = create_random_employee(db, task)
+    uow = PostgresUnitOfWork(db)
+    aggregate_id = TaskService(uow).create_task(assign_command(task, employee))
+    uow.outbox = FailingOutboxRepository(db)
+
+    with pytest.raises(RuntimeError):
+        TaskService(uow).handle_command(SubmitTaskCommand(aggregate_id=aggregate_id))
+
+    employee_task = db.get(EmployeeTask, aggregate_id)
+    assert employee_task.status == TaskStatus.ASSIGNED
+    events = db.exec(select(TaskEvent).where(TaskEvent.aggregate_id == aggregate_id)).all()
+    assert len(events) == 1
+
+
+def test_commands_bump_aggregate_version(db: Session) -> None:
+    task = create_random_available_task(db, requires_approval=True)
+    employee = create_random_employee(db, task)
+    service = TaskService(PostgresUnitOfWork(db))
+    aggregate_id = service.create_task(assign_command(task, employee))
+
+    service.handle_command(SubmitTaskCommand(aggregate_id=aggregate_id))
+    service.handle_command(ApproveTaskCommand(aggregate_id=aggregate_id, approved_by_id=employee.id))
+
+    employee_task = db.get(EmployeeTask, aggregate_id)
+    assert employee_task.version == 3
+    assert [event.version for event in service.get_aggregates(aggregate_id)] == [1, 2, 3]
+
+
+def test_append_with_stale_version_raises_conflict(db: Session) -> None:
+    task = create_random_available_task(db, requires_approval=True)
+    employee = create_random_employee(db, task)
+    uow = PostgresUnitOfWork(db)
+    service = TaskService(uow)
+    aggregate_id = service.create_task(assign_command(task, employee))
+    stale_task = EmployeeTask(**db.get(EmployeeTask, aggregate_id).model_dump())
+    stale_event = handle_command(CancelTaskCommand(aggregate_id=aggregate_id, reason="late"), stale_task)
+    service.handle_command(SubmitTaskCommand(aggregate_id=aggregate_id))
+
+    with pytest.raises(ConcurrencyError):
+        with uow:
+            uow.tasks.append(apply_event(stale_event, stale_task), stale_event, expected_version=1)
+
+    assert [event.version for event in service.get_aggregates(aggregate_id)] == [1, 2]
+
+
+def test_event_feed_holds_back_events_behind_running_transaction(db: Session) -> None:
+    task = create_random_available_task(db)
+    employees = [create_random_employee(db, task) for _ in range(2)]
+    after = db.exec(select(func.coalesce(func.max(TaskEvent.sequence), 0))).one()
+
+    with Session(engine) as slow:
+        # Takes the lower sequence but commits last
+        TaskService(PostgresUnitOfWork(slow)).repository.save_event(EmployeeTaskDomain.create(assign_command(task, employees[0]))[1])
+        slow.flush()
+        fast_id = TaskService(PostgresUnitOfWork(Session(engine))).create_task(assign_command(task, employees[1]))
+
+        service = TaskService(PostgresUnitOfWork(Session(engine)))
+        assert service.get_event_feed(after, 10) == []
+
+        slow.commit()
+
+    events = service.get_event_feed(after, 10)
+    assert [event.aggregate_id for event in events][1] == fast_id
+    assert [event.sequence for event in events] == sorted(event.sequence for event in events)
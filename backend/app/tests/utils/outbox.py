@@ -0,0 +1,27 @@
+import time
+from datetime import datetime
+
+from sqlmodel import Session, func, select
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models import OutboxMessage
+from app.outbox.dispatcher import OutboxDispatcher
+
+
+def drain_outbox(db: Session, timeout: float = 10.0) -> None:
+    # The API's in-process dispatcher may hold some messages, wait until none are due
+    dispatcher = OutboxDispatcher(engine)
+    deadline = time.monotonic() + timeout
+    while True:
+        dispatcher.dispatch_once()
+        pending = db.exec(
+            select(func.count()).select_from(OutboxMessage).where(
+                OutboxMessage.processed_at.is_(None),
+                OutboxMessage.available_at <= datetime.now(),
+                OutboxMessage.attempts < settings.OUTBOX_MAX_ATTEMPTS,
+            )
+        ).one()
+        if not pending or time.monotonic() > deadline:
+            return
+        time.sleep(0.05)
@@ -0,0 +1,50 @@
+from sqlmodel import Session
+
+from app import crud
+from app.api.users.skills_models import GlobalSkillCreate
+from app.api.users.users_models import UserCreate
+from app.models import AvailableTask, AvailableTaskCreate, DepartmentCreate, User
+from app.tasks.task_models import AssignTaskCommand
+from app.tests.utils.company import create_random_company
+from app.tests.utils.utils import random_email, random_lower_string
+
+
+def create_random_available_task(
+    db: Session, *, requires_approval: bool = False, person_xp: int = 100, skill_xp: int = 50
+) -> AvailableTask:
+    company = create_random_company(db)
+    department_in = DepartmentCreate(name=random_lower_string(), company_id=company.id)
+    department = crud.create_department(session=db, department_in=department_in)
+    skill_in = GlobalSkillCreate(name=random_lower_string(), department_id=department.id)
+    skill = crud.create_global_skill(session=db, skill_in=skill_in)
+    task_in = AvailableTaskCreate(
+        title=random_lower_string(),
+        description=random_lower_string(),
+        requires_approval=requires_approval,
+        department_id=department.id,
+        skill_id=skill.id,
+        company_id=company.id,
+        person_xp=person_xp,
+        skill_xp=skill_xp,
+    )
+    return crud.create_available_task(session=db, task_in=task_in)
+
+
+def create_random_employee(db: Session, task: AvailableTask) -> User:
+    user_in = UserCreate(
+        email=random_email(),
+        password=random_lower_string(),
+        company_id=task.company_id,
+        department_id=task.department_id,
+    )
+    return crud.create_user(session=db, user_create=user_in)
+
+
+def assign_command(task: AvailableTask, employee: User) -> AssignTaskCommand:
+    return AssignTaskCommand(
+        assigned_to_id=employee.id,
+        task_id=task.id,
+        title=task.title,
+        description=task.description,
+        requires_approval=task.requires_approval,
+    )